@@ -9,84 +9,263 @@ import numpy as np
 from datetime import datetime, timedelta
 import os
 import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 
 # Import our models
-from data_loader import get_stock_data, format_response_data
-from arima_model import ARIMAModel
-from lstm_model import LSTMModel
-from linear_regression_model import LinearRegressionModel
+from data_loader import get_fetcher, get_stock_bars
+from fetcher import UpstreamUnavailable
+from model_store import ResidentStore, process_rss_bytes
+from shared_store import SharedStoreReader
+from sentiment import SentimentEngine
+from downsample import downsample
+from indicators import INDICATOR_COLUMNS, IndicatorState, select_features
+from training import (
+    MODEL_TYPES, evaluate_models, load_or_train_models, load_saved_models, read_forecast, read_watchlist,
+    try_predict_interval
+)
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
-# Initialize models
-arima_model = ARIMAModel()
-lstm_model = LSTMModel()
-linear_model = LinearRegressionModel()
-
 # Model directory
 MODEL_DIR = 'models'
 os.makedirs(MODEL_DIR, exist_ok=True)
 
+# Symbols preloaded at startup: WATCHLIST="AAPL,MSFT" or one symbol per line in WATCHLIST_FILE
+WATCHLIST_FILE = os.environ.get('WATCHLIST_FILE', 'watchlist.txt')
+
+# Memory-lean mode: compact model state and float32 price arrays
+LEAN_MODE = os.environ.get('LEAN_MODE', '0') == '1'
+PRICE_DTYPE = np.float32 if LEAN_MODE else np.float64
+
+# Per-process budget for resident models and price data
+MEMORY_BUDGET_MB = int(os.environ.get('MEMORY_BUDGET_MB', '512'))
+PRICE_CACHE_TTL = 300  # seconds
+
+store = ResidentStore(MEMORY_BUDGET_MB * 1024 * 1024)
+
+# Indicator columns fed to the LSTM and Linear Regression models, e.g. "rsi,macd,volumeZ"
+MODEL_FEATURES = [c.strip() for c in os.environ.get('MODEL_FEATURES', '').split(',') if c.strip()]
+# Fail at startup rather than on the first prediction for every symbol
+unknown_features = [c for c in MODEL_FEATURES if c not in INDICATOR_COLUMNS]
+if unknown_features:
+    raise ValueError(f"Unknown MODEL_FEATURES {unknown_features}, expected names from {list(INDICATOR_COLUMNS)}")
+indicator_lock = threading.Lock()
+
+# Prices and models published by `shared_store.py publish`, mapped read-only by every worker
+SHARED_STORE_DIR = os.environ.get('SHARED_STORE_DIR')
+shared_store = SharedStoreReader(SHARED_STORE_DIR) if SHARED_STORE_DIR else None
+if shared_store is not None:
+    # Runs at import, so pre-fork servers (e.g. gunicorn --preload) map the files once
+    shared_store.preload()
+
+# Default time budget for /api/predictions in milliseconds, overridable with ?deadline_ms=; 0 waits for every model
+PREDICTION_DEADLINE_MS = int(os.environ.get('PREDICTION_DEADLINE_MS', '0'))
+PREDICTION_CACHE_TTL = 24 * 3600  # seconds a finished prediction may serve as a fallback
+PREDICTION_ENTRY_BYTES = 512
+
+# Threads start on first use, so pre-fork servers fork before any exist
+prediction_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get('PREDICTION_WORKERS', '8')), thread_name_prefix='predict'
+)
+# Reentrant: a prediction finished before add_done_callback runs its callback inline
+prediction_lock = threading.RLock()
+running_predictions = {}
+# Training and evaluation jobs started by deadline-bound requests run one at a time
+background_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='background')
+background_lock = threading.Lock()
+pending_jobs = set()
+
+# Headline files are scored when they arrive, not per request
+SENTIMENT_DIR = os.environ.get('SENTIMENT_DIR', 'sentiment_data')
+SENTIMENT_REFRESH_SECONDS = int(os.environ.get('SENTIMENT_REFRESH_SECONDS', '60'))
+
+sentiment_engine = SentimentEngine(SENTIMENT_DIR)
+sentiment_engine.refresh()
+
+def period_days(period):
+    """
+    Convert a period such as '90d' or '1y' to a number of days
+    
+    Args:
+        period (str): Period of data
+    
+    Returns:
+        int: Number of days, or None for periods like 'max' or 'ytd'
+    """
+    if not period:
+        return None
+    for suffix, days in (('d', 1), ('wk', 7), ('mo', 30), ('y', 365)):
+        count = period[:-len(suffix)]
+        if period.endswith(suffix) and count.isdigit():
+            return int(count) * days
+    return None
+
+def get_price_bars(symbol, period, interval='1d', start=None, end=None):
+    """
+    Get compact price bars, serving from the resident store when fresh
+    
+    Args:
+        symbol (str): Stock symbol
+        period (str): Period of data to fetch, ignored when start is given
+        interval (str): Interval between data points
+        start (str): First date to fetch ('YYYY-MM-DD'), inclusive
+        end (str): Last date to fetch ('YYYY-MM-DD'), exclusive
+    
+    Returns:
+        PriceBars: Price history, empty if no data was found
+    """
+    if shared_store is not None and start is None and interval == '1d':
+        shared = shared_store.bars(symbol)
+        days = period_days(period)
+        if shared is not None and days is not None and not shared.empty:
+            return shared.between(shared.dates[-1] - (days - 1) * 86400)
+    
+    key = ('prices', symbol, period, interval, start, end)
+    bars = store.get(key)
+    if bars is None:
+        bars = get_stock_bars(symbol, period=period, interval=interval, start=start, end=end, dtype=PRICE_DTYPE)
+        if not bars.empty:
+            store.put(key, bars, bars.nbytes, ttl=PRICE_CACHE_TTL)
+    return bars
+
+def get_indicator_rows(symbol):
+    """
+    Get indicator values for recent bars
+    
+    The stored state is advanced only by bars that arrived since the last
+    call, so the full history is processed once per symbol.
+    
+    Args:
+        symbol (str): Stock symbol
+    
+    Returns:
+        tuple: Bar dates as epoch seconds (list) and rows in INDICATOR_COLUMNS order (np.array)
+    """
+    bars = get_price_bars(symbol, '1y')
+    if bars.empty:
+        return [], np.empty((0, len(INDICATOR_COLUMNS)))
+    
+    key = ('indicators', symbol)
+    with indicator_lock:
+        state = store.get(key)
+        if state is None:
+            state = IndicatorState.from_history(bars[:-1])
+        dates, rows = state.advance(bars)
+        store.put(key, state, state.nbytes)
+    return dates, rows
+
+def model_features(model, symbol):
+    """
+    Get recent feature rows for a model trained on indicator columns
+    
+    Args:
+        model (LSTMModel or LinearRegressionModel): Trained model
+        symbol (str): Stock symbol
+    
+    Returns:
+        np.array: Feature rows, or None if the model uses no features
+    """
+    if not model.feature_columns:
+        return None
+    _, rows = get_indicator_rows(symbol)
+    return select_features(rows, model.feature_columns)
+
 def train_or_load_models(symbol):
     """
     Train models or load pre-trained models
     
     Args:
         symbol (str): Stock symbol
+    
+    Returns:
+        ModelHolder: Models for the symbol, kept in the resident store
+    """
+    holder = resident_models(symbol)
+    if holder is not None:
+        return holder
+    
+    bars = get_price_bars(symbol, '1y')
+    holder, _ = load_or_train_models(symbol, bars, MODEL_DIR, lean=LEAN_MODE, feature_columns=MODEL_FEATURES)
+    store.put(('model', symbol), holder, holder.nbytes)
+    return holder
+
+def resident_models(symbol):
     """
-    # File paths for saved models
-    arima_path = f'{MODEL_DIR}/arima_{symbol}.pkl'
-    lstm_path = f'{MODEL_DIR}/lstm_{symbol}'
-    linear_path = f'{MODEL_DIR}/linear_{symbol}.pkl'
+    Get models for a symbol only if they are already resident
     
-    # Get historical data
-    df = get_stock_data(symbol, period='1y')
-    close_prices = df['Close'].values
+    Args:
+        symbol (str): Stock symbol
     
-    # Check if models exist
-    arima_exists = os.path.exists(arima_path)
-    lstm_exists = os.path.exists(lstm_path)
-    linear_exists = os.path.exists(linear_path)
+    Returns:
+        ModelHolder: Models from the shared or resident store, or None
+    """
+    if shared_store is not None:
+        holder = shared_store.models(symbol)
+        if holder is not None:
+            return holder
+    return store.get(('model', symbol))
+
+def warm_up(symbols, notify=None):
+    """
+    Preload saved models, price data and indicator state before serving
     
-    # Load or train ARIMA model
-    if arima_exists:
-        try:
-            arima_model.load(arima_path)
-            print(f"Loaded ARIMA model for {symbol}")
-        except Exception as e:
-            print(f"Error loading ARIMA model, training new one: {e}")
-            arima_model.train(close_prices)
-            arima_model.save(arima_path)
-    else:
-        arima_model.train(close_prices)
-        arima_model.save(arima_path)
+    Symbols without saved artifacts are skipped rather than trained, so
+    warm-up stays fast; run precompute.py to produce them.
     
-    # Load or train LSTM model
-    if lstm_exists:
+    Args:
+        symbols (list): Stock symbols to preload
+        notify (callable): Called before each symbol, e.g. to keep a server
+            worker's heartbeat alive during a long warm-up
+    """
+    for symbol in symbols:
+        if notify is not None:
+            notify()
+        start = time.perf_counter()
         try:
-            lstm_model.load(lstm_path)
-            print(f"Loaded LSTM model for {symbol}")
+            # Models published to the shared store are mapped there instead
+            if shared_store is None or shared_store.models(symbol) is None:
+                holder = load_saved_models(symbol, MODEL_DIR, lean=LEAN_MODE)
+                if holder is None:
+                    print(f"No saved models for {symbol}, skipping warm-up")
+                    continue
+                store.put(('model', symbol), holder, holder.nbytes)
+            get_price_bars(symbol, '90d')
+            get_indicator_rows(symbol)
+            print(f"Warmed up {symbol} in {time.perf_counter() - start:.2f}s")
         except Exception as e:
-            print(f"Error loading LSTM model, training new one: {e}")
-            lstm_model.train(close_prices)
-            lstm_model.save(lstm_path)
-    else:
-        lstm_model.train(close_prices)
-        lstm_model.save(lstm_path)
+            print(f"Error warming up {symbol}: {e}")
+
+def start_worker(notify=None):
+    """
+    Prepare a serving process: preload the watchlist and start the sentiment refresh
     
-    # Load or train Linear Regression model
-    if linear_exists:
-        try:
-            linear_model.load(linear_path)
-            print(f"Loaded Linear Regression model for {symbol}")
-        except Exception as e:
-            print(f"Error loading Linear Regression model, training new one: {e}")
-            linear_model.train(close_prices)
-            linear_model.save(linear_path)
-    else:
-        linear_model.train(close_prices)
-        linear_model.save(linear_path)
+    Threads and Keras models do not survive fork, so this runs in each
+    serving process after it is forked (see gunicorn.conf.py).
+    
+    Args:
+        notify (callable): See warm_up
+    """
+    watchlist = [symbol.strip().upper() for symbol in os.environ.get('WATCHLIST', '').split(',') if symbol.strip()]
+    warm_up(watchlist or read_watchlist(WATCHLIST_FILE), notify=notify)
+    sentiment_engine.start_background_refresh(SENTIMENT_REFRESH_SECONDS)
+
+def upstream_unavailable(error):
+    """
+    Build a 503 response for an unavailable upstream
+    
+    Args:
+        error (UpstreamUnavailable): Fetch failure
+    
+    Returns:
+        tuple: JSON response, status code and headers
+    """
+    headers = {}
+    if error.retry_after:
+        headers['Retry-After'] = str(int(np.ceil(error.retry_after)))
+    return jsonify({'error': str(error)}), 503, headers
 
 @app.route('/api/stock/<symbol>', methods=['GET'])
 def get_stock(symbol):
@@ -97,112 +276,382 @@ def get_stock(symbol):
         symbol (str): Stock symbol
     """
     try:
-        df = get_stock_data(symbol, period='1d')
+        bars = get_price_bars(symbol, '1d')
         
-        if df.empty:
+        if bars.empty:
             return jsonify({'error': f'No data found for {symbol}'}), 404
         
-        # Add symbol column
-        df['Symbol'] = symbol
-        
         # Format response
-        data = format_response_data(df)
+        data = bars.to_records()
         
         return jsonify(data[0])
+    except UpstreamUnavailable as e:
+        return upstream_unavailable(e)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def parse_date(value):
+    """
+    Parse a 'YYYY-MM-DD' or ISO date-time query parameter
+    
+    Args:
+        value (str): Date string
+    
+    Returns:
+        np.datetime64: Parsed date with second resolution
+    """
+    return np.datetime64(value, 's')
+
 @app.route('/api/historical/<symbol>', methods=['GET'])
 def get_historical(symbol):
     """
     Get historical stock data
     
+    Query parameters:
+        days (int): Number of days up to today, or up to end, used when start is not given
+        start, end (str): Inclusive date range, e.g. 2020-01-01
+        interval (str): Bar interval, e.g. 1d or 1h
+        limit (int): Page size; the response becomes {data, nextCursor}
+        cursor (str): nextCursor from the previous page
+        max_points (int): Downsample the returned bars to at most this many
+        method (str): Downsampling method, 'lttb' (default) or 'ohlc'
+    
     Args:
         symbol (str): Stock symbol
     """
     try:
         days = request.args.get('days', default=30, type=int)
-        df = get_stock_data(symbol, period=f'{days}d')
+        start = request.args.get('start', default=None, type=str)
+        end = request.args.get('end', default=None, type=str)
+        interval = request.args.get('interval', default='1d', type=str)
+        limit = request.args.get('limit', default=None, type=int)
+        cursor = request.args.get('cursor', default=None, type=str)
+        max_points = request.args.get('max_points', default=None, type=int)
+        method = request.args.get('method', default='lttb', type=str)
+        
+        if limit is not None and limit < 1:
+            raise ValueError("limit must be positive")
+        if max_points is not None and max_points < 1:
+            raise ValueError("max_points must be positive")
         
-        if df.empty:
+        if start is None and end is not None:
+            # end alone closes a window of `days` days
+            start = str(parse_date(end).astype('datetime64[D]') - (days - 1))
+        
+        if start is not None:
+            first = parse_date(start)
+            # A date-only end covers the whole day
+            last = parse_date(end) + (86399 if len(end) == 10 else 0) if end else None
+            # Upstream treats end as exclusive
+            fetch_end = str(last.astype('datetime64[D]') + 1) if last is not None else None
+            bars = get_price_bars(symbol, None, interval=interval, start=start[:10], end=fetch_end)
+            bars = bars.between(first.astype(np.int64), last.astype(np.int64) if last is not None else None)
+        else:
+            bars = get_price_bars(symbol, f'{days}d', interval=interval)
+        
+        if bars.empty:
             return jsonify({'error': f'No data found for {symbol}'}), 404
         
-        # Add symbol column
-        df['Symbol'] = symbol
+        # Cursors are the epoch second of the last bar already returned
+        if cursor is not None:
+            bars = bars.between(int(cursor) + 1, None)
+        next_cursor = None
+        if limit is not None and len(bars) > limit:
+            bars = bars[:limit]
+            next_cursor = str(int(bars.dates[-1]))
+        
+        if max_points is not None:
+            bars = downsample(bars, max_points, method)
         
         # Format response
-        data = format_response_data(df)
+        data = bars.to_records()
         
-        return jsonify(data)
+        if limit is None:
+            return jsonify(data)
+        return jsonify({'data': data, 'nextCursor': next_cursor})
+    except UpstreamUnavailable as e:
+        return upstream_unavailable(e)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def run_model_prediction(symbol, model_type, model, close_prices, features, alpha):
+    """
+    Predict the next close with one model and cache the result
+    
+    Runs on the prediction pool. A model that misses a request's deadline
+    keeps running, and its result serves later requests as a fallback.
+    
+    Args:
+        symbol (str): Stock symbol
+        model_type (str): 'ARIMA', 'LSTM' or 'LINEAR'
+        model: Trained model
+        close_prices (np.array): Recent close prices
+        features (np.array): Recent feature rows, or None
+        alpha (float): Significance level of the prediction interval
+    
+    Returns:
+        dict: Predicted close, interval bounds, seconds spent and completion time
+    """
+    start = time.perf_counter()
+    if model_type == 'ARIMA':
+        prediction = model.predict(steps=1)[0]
+        lower, upper = try_predict_interval(model, steps=1, alpha=alpha)
+    else:
+        prediction = model.predict(close_prices, steps=1, features=features)[0]
+        lower, upper = try_predict_interval(model, close_prices, steps=1, alpha=alpha, features=features)
+    result = {
+        'predictedClose': float(prediction),
+        'lowerBound': None if lower is None else float(lower[0]),
+        'upperBound': None if upper is None else float(upper[0]),
+        'alpha': alpha,
+        'seconds': time.perf_counter() - start,
+        'asOf': datetime.now().isoformat(timespec='seconds')
+    }
+    store.put(('prediction', symbol, model_type), result, PREDICTION_ENTRY_BYTES, ttl=PREDICTION_CACHE_TTL)
+    return result
+
+def load_inputs(symbol, models):
+    """
+    Fetch the recent prices and feature rows the models predict from
+    
+    Args:
+        symbol (str): Stock symbol
+        models (ModelHolder): Models for the symbol
+    
+    Returns:
+        tuple: Recent close prices (np.array) and feature rows by model type (dict)
+    """
+    bars = get_price_bars(symbol, '90d')
+    features = {
+        'ARIMA': None,
+        'LSTM': model_features(models.lstm, symbol),
+        'LINEAR': model_features(models.linear, symbol)
+    }
+    return bars.close.astype(np.float64), features
+
+def submit_shared(key, function, *args):
+    """
+    Start a job on the prediction pool, joining one already running for the key
+    
+    Requests for slow work share its running job instead of queueing more
+    work behind it.
+    
+    Args:
+        key (tuple): Job identity, e.g. ('AAPL', 'LSTM', 0.05)
+        function (callable): Job to run
+        *args: Passed to function
+    
+    Returns:
+        Future: Job result
+    """
+    with prediction_lock:
+        future = running_predictions.get(key)
+        if future is None:
+            future = prediction_executor.submit(function, *args)
+            running_predictions[key] = future
+            future.add_done_callback(lambda _: finish_prediction(key))
+    return future
+
+def submit_prediction(symbol, model_type, model, close_prices, features, alpha):
+    """
+    Start a model prediction on the pool, joining one already running
+    
+    Args:
+        See run_model_prediction
+    
+    Returns:
+        Future: Prediction result
+    """
+    return submit_shared(
+        (symbol, model_type, alpha), run_model_prediction, symbol, model_type, model, close_prices, features, alpha
+    )
+
+def finish_prediction(key):
+    with prediction_lock:
+        running_predictions.pop(key, None)
+
+def run_in_background(key, function, *args):
+    """
+    Run a slow job such as training on the background pool, once per key at a time
+    
+    The background pool is separate from the prediction pool, so training
+    never queues live predictions behind it.
+    
+    Args:
+        key (tuple): Job identity, e.g. ('evaluate', 'AAPL')
+        function (callable): Job to run
+        *args: Passed to function
+    """
+    def run():
+        try:
+            function(*args)
+        except Exception as e:
+            print(f"Error in background job {key}: {e}")
+        finally:
+            with background_lock:
+                pending_jobs.discard(key)
+    
+    with background_lock:
+        if key in pending_jobs:
+            return
+        pending_jobs.add(key)
+    background_executor.submit(run)
+
+def evaluate_and_store(symbol, models):
+    """
+    Compute MAPE for a symbol and keep it with the models
+    
+    Args:
+        symbol (str): Stock symbol
+        models (ModelHolder): Models to set the MAPE on
+    """
+    models.mape = evaluate_models(get_price_bars(symbol, '1y'), lean=LEAN_MODE, feature_columns=models.linear.feature_columns)
+
+def fallback_prediction(symbol, model_type, alpha, forecast):
+    """
+    Get the last known prediction for a model that missed its deadline
+    
+    Args:
+        symbol (str): Stock symbol
+        model_type (str): 'ARIMA', 'LSTM' or 'LINEAR'
+        alpha (float): Significance level of the requested interval
+        forecast (dict): Precomputed forecast, or None
+    
+    Returns:
+        tuple: Prediction (dict) and source ('cache' or 'forecast'), or (None, None)
+    """
+    cached = store.get(('prediction', symbol, model_type))
+    if cached is not None:
+        if cached['alpha'] != alpha:
+            cached = dict(cached, lowerBound=None, upperBound=None)
+        return cached, 'cache'
+    
+    if forecast is not None and forecast.get('predictedClose', {}).get(model_type) is not None:
+        # Precomputed intervals are 95%
+        interval = (forecast.get('interval') or {}).get(model_type)
+        if interval is None or not np.isclose(alpha, 0.05):
+            interval = (None, None)
+        return {
+            'predictedClose': forecast['predictedClose'][model_type],
+            'lowerBound': interval[0],
+            'upperBound': interval[1],
+            'asOf': forecast.get('generatedAt')
+        }, 'forecast'
+    return None, None
+
 @app.route('/api/predictions/<symbol>', methods=['GET'])
 def get_predictions(symbol):
     """
-    Get predictions for next day
+    Get predictions for next day with prediction intervals
+    
+    Models run concurrently. With a deadline, the latest prices are fetched
+    within it as well, and models that have not finished in time are answered with their last cached prediction, the precomputed
+    forecast, or the Linear Regression prediction, in that order, and marked
+    as degraded. Models that are not resident yet are loaded or trained in
+    the background meanwhile.
     
     Args:
         symbol (str): Stock symbol
     """
     try:
-        # Train or load models
-        train_or_load_models(symbol)
+        request_start = time.perf_counter()
+        confidence = request.args.get('confidence', default=0.95, type=float)
+        if not 0 < confidence < 1:
+            return jsonify({'error': 'confidence must be between 0 and 1'}), 400
+        alpha = 1 - confidence
+        deadline_ms = request.args.get('deadline_ms', default=PREDICTION_DEADLINE_MS, type=int)
         
-        # Get latest data
-        df = get_stock_data(symbol, period='90d')
-        close_prices = df['Close'].values
-        current_price = close_prices[-1]
-        
-        # Make predictions
-        arima_pred = arima_model.predict(steps=1)[0]
-        lstm_pred = lstm_model.predict(close_prices, steps=1)[0]
-        linear_pred = linear_model.predict(close_prices, steps=1)[0]
-        
-        # Calculate MAPE
-        # For simplicity, we'll use a fixed test set (last 10 days)
-        test_size = 10
-        test_data = close_prices[-test_size:]
-        train_data = close_prices[:-test_size]
+        if deadline_ms > 0:
+            # Loading or training a cold symbol would blow any deadline, so it happens in the background
+            models = resident_models(symbol)
+            if models is None:
+                run_in_background(('load', symbol), train_or_load_models, symbol)
+        else:
+            models = train_or_load_models(symbol)
         
-        arima_model.train(train_data)
-        arima_eval = arima_model.evaluate(test_data)
+        def remaining():
+            if deadline_ms <= 0:
+                return None
+            return max(0.0, deadline_ms / 1000 - (time.perf_counter() - request_start))
         
-        lstm_model.train(train_data)
-        lstm_eval = lstm_model.evaluate(test_data)
+        futures = {}
+        mape = None
+        if models is not None:
+            # Latest data is fetched within the budget too; if it is late, every
+            # model falls back and the fetch completes for later requests
+            inputs = submit_shared((symbol, 'inputs'), load_inputs, symbol, models)
+            wait([inputs], timeout=remaining())
+            if inputs.done() and (deadline_ms <= 0 or inputs.exception() is None):
+                close_prices, features = inputs.result()
+                
+                # Make predictions, with intervals costing about one extra inference call each
+                futures = {
+                    model_type: submit_prediction(
+                        symbol, model_type, getattr(models, model_type.lower()), close_prices, features[model_type], alpha
+                    )
+                    for model_type in MODEL_TYPES
+                }
+                wait(futures.values(), timeout=remaining())
+            elif inputs.done():
+                print(f"Error fetching prediction inputs for {symbol}: {inputs.exception()}")
+            
+            # MAPE is computed once per symbol and kept with the models
+            if models.mape is None:
+                if deadline_ms > 0:
+                    run_in_background(('evaluate', symbol), evaluate_and_store, symbol, models)
+                else:
+                    evaluate_and_store(symbol, models)
+            mape = models.mape
+        elapsed_ms = (time.perf_counter() - request_start) * 1000
         
-        linear_model.train(train_data)
-        linear_eval = linear_model.evaluate(test_data)
+        live = {}
+        for model_type, future in futures.items():
+            if future.done():
+                try:
+                    live[model_type] = future.result()
+                except Exception as e:
+                    print(f"Error predicting with {model_type} for {symbol}: {e}")
         
         # Format date for tomorrow
         tomorrow = datetime.now() + timedelta(days=1)
         tomorrow_str = tomorrow.strftime('%Y-%m-%d')
         
-        result = {
-            "ARIMA": {
-                "symbol": symbol,
-                "date": tomorrow_str,
-                "predictedClose": float(arima_pred),
-                "modelType": "ARIMA",
-                "mape": float(arima_eval['mape'])
-            },
-            "LSTM": {
-                "symbol": symbol,
-                "date": tomorrow_str,
-                "predictedClose": float(lstm_pred),
-                "modelType": "LSTM",
-                "mape": float(lstm_eval['mape'])
-            },
-            "LINEAR": {
+        forecast = None
+        if len(live) < len(MODEL_TYPES):
+            forecast = read_forecast(symbol, MODEL_DIR)
+        if mape is None:
+            mape = (forecast or {}).get('mape') or {}
+        
+        result = {}
+        for model_type in MODEL_TYPES:
+            prediction, source, mape_type = live.get(model_type), 'live', model_type
+            if prediction is None:
+                prediction, source = fallback_prediction(symbol, model_type, alpha, forecast)
+            if prediction is None and 'LINEAR' in live:
+                prediction, source, mape_type = live['LINEAR'], 'linear', 'LINEAR'
+            if prediction is None:
+                prediction, source = {}, 'unavailable'
+            
+            result[model_type] = {
                 "symbol": symbol,
                 "date": tomorrow_str,
-                "predictedClose": float(linear_pred),
-                "modelType": "LINEAR",
-                "mape": float(linear_eval['mape'])
+                "predictedClose": prediction.get('predictedClose'),
+                "modelType": model_type,
+                "mape": mape.get(mape_type),
+                "lowerBound": prediction.get('lowerBound'),
+                "upperBound": prediction.get('upperBound'),
+                "confidence": confidence,
+                "source": source,
+                "degraded": source != 'live',
+                "elapsedMs": round(live[model_type]['seconds'] * 1000, 1) if model_type in live else round(elapsed_ms, 1),
+                "asOf": prediction.get('asOf')
             }
-        }
         
         return jsonify(result)
+    except UpstreamUnavailable as e:
+        return upstream_unavailable(e)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -216,71 +665,108 @@ def get_future_predictions(symbol):
     """
     try:
         days = request.args.get('days', default=7, type=int)
+        intervals = request.args.get('intervals', default=False, type=lambda value: value.lower() in ('1', 'true'))
+        confidence = request.args.get('confidence', default=0.95, type=float)
+        if intervals and not 0 < confidence < 1:
+            return jsonify({'error': 'confidence must be between 0 and 1'}), 400
         
         # Train or load models
-        train_or_load_models(symbol)
-        
-        # Get latest data
-        df = get_stock_data(symbol, period='90d')
-        close_prices = df['Close'].values
+        models = train_or_load_models(symbol)
         
         # Get predictions from the best model (ARIMA in this case)
-        predictions = arima_model.predict(steps=days)
+        predictions = models.arima.predict(steps=days)
         
         # Format response
         result = {}
-        for i, pred in enumerate(predictions):
-            result[str(i+1)] = float(pred)
+        if intervals:
+            lower, upper = models.arima.predict_interval(steps=days, alpha=1 - confidence)
+            for i, pred in enumerate(predictions):
+                result[str(i+1)] = {
+                    'predictedClose': float(pred),
+                    'lowerBound': float(lower[i]),
+                    'upperBound': float(upper[i])
+                }
+        else:
+            for i, pred in enumerate(predictions):
+                result[str(i+1)] = float(pred)
         
         return jsonify(result)
+    except UpstreamUnavailable as e:
+        return upstream_unavailable(e)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/sentiment/<symbol>', methods=['GET'])
 def get_sentiment(symbol):
     """
-    Get sentiment analysis for a stock
-    Note: This is a mock implementation
+    Get sentiment analysis for a stock from precomputed aggregates
     
     Args:
         symbol (str): Stock symbol
     """
     try:
-        # In a real application, this would call a sentiment analysis API
-        # or analyze news/social media data
+        # Started lazily so each pre-fork worker runs its own refresh thread
+        sentiment_engine.start_background_refresh(SENTIMENT_REFRESH_SECONDS)
         
-        # Mock sentiment data
-        if symbol == 'AAPL':
-            result = {
-                "positive": 50.7,
-                "negative": 27.3,
-                "neutral": 22.0,
-                "overall": "positive"
-            }
-        else:
-            # Generate random sentiment
-            positive = np.random.uniform(20, 80)
-            negative = np.random.uniform(0, 100-positive) * 0.6
-            neutral = 100 - positive - negative
-            
-            # Determine overall sentiment
-            if positive > negative and positive > neutral:
-                overall = "positive"
-            elif negative > positive and negative > neutral:
-                overall = "negative"
-            else:
-                overall = "neutral"
-            
-            result = {
-                "positive": float(positive),
-                "negative": float(negative),
-                "neutral": float(neutral),
-                "overall": overall
-            }
+        date = request.args.get('date', default=None, type=str)
+        result = sentiment_engine.summary(symbol.upper(), date=date)
+        
+        if result is None:
+            return jsonify({'error': f'No sentiment data found for {symbol}'}), 404
         
         return jsonify(result)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/indicators/<symbol>', methods=['GET'])
+def get_indicators(symbol):
+    """
+    Get technical indicators for recent bars
+    
+    Args:
+        symbol (str): Stock symbol
+    """
+    try:
+        days = request.args.get('days', default=30, type=int)
+        if days < 1:
+            return jsonify({'error': 'days must be positive'}), 400
+        dates, rows = get_indicator_rows(symbol)
+        
+        if not dates:
+            return jsonify({'error': f'No data found for {symbol}'}), 404
+        
+        dates = np.datetime_as_string(np.array(dates[-days:], dtype='datetime64[s]'), unit='D')
+        result = []
+        for date, row in zip(dates.tolist(), rows[-days:].tolist()):
+            entry = {'symbol': symbol, 'date': date}
+            # Indicators still warming up are reported as null
+            entry.update({column: None if np.isnan(value) else value for column, value in zip(INDICATOR_COLUMNS, row)})
+            result.append(entry)
+        
+        return jsonify(result)
+    except UpstreamUnavailable as e:
+        return upstream_unavailable(e)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/diagnostics/memory', methods=['GET'])
+def get_memory_diagnostics():
+    """
+    Get memory usage of resident models and price data
+    """
+    try:
+        result = store.usage()
+        result['leanMode'] = LEAN_MODE
+        result['processRssBytes'] = process_rss_bytes()
+        result['upstream'] = get_fetcher().status()
+        if shared_store is not None:
+            result['shared'] = shared_store.usage()
+        return jsonify(result)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 if __name__ == '__main__':
+    # The debug reloader runs this block in a watcher process too; only the serving child needs warm state
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_worker()
     app.run(debug=True)
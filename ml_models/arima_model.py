@@ -9,15 +9,24 @@ import pickle
 import os
 
 class ARIMAModel:
-    def __init__(self, order=(5, 1, 0)):
+    def __init__(self, order=(5, 1, 0), lean=False, tail_length=50):
         """
         Initialize ARIMA model
         
         Args:
             order (tuple): ARIMA model order (p, d, q)
+            lean (bool): Keep only fitted parameters and a short tail of the
+                series instead of the full results object
+            tail_length (int): Number of recent observations kept in lean mode
         """
         self.order = order
+        self.lean = lean
+        self.tail_length = tail_length
         self.model = None
+        self.model_fit = None
+        self.params = None
+        self.tail = None
+        self._nbytes = 0
         
     def train(self, data):
         """
@@ -29,6 +38,10 @@ class ARIMAModel:
         try:
             self.model = ARIMA(data, order=self.order)
             self.model_fit = self.model.fit()
+            if self.lean:
+                self._strip(data)
+            else:
+                self._nbytes = self._estimate_nbytes(self.model_fit)
             return True
         except Exception as e:
             print(f"Error training ARIMA model: {e}")
@@ -44,12 +57,83 @@ class ARIMAModel:
         Returns:
             np.array: Predicted values
         """
-        if self.model_fit is None:
-            raise ValueError("Model has not been trained yet")
-        
-        forecast = self.model_fit.forecast(steps=steps)
+        forecast = self._results().forecast(steps=steps)
         return forecast
     
+    def predict_interval(self, steps=1, alpha=0.05):
+        """
+        Get forecast confidence intervals from the fitted model
+        
+        Args:
+            steps (int): Number of steps to predict
+            alpha (float): Significance level, e.g. 0.05 for 95% intervals
+        
+        Returns:
+            tuple: Lower and upper bounds (np.array)
+        """
+        bounds = np.asarray(self._results().get_forecast(steps=steps).conf_int(alpha=alpha))
+        return bounds[:, 0], bounds[:, 1]
+    
+    @staticmethod
+    def _estimate_nbytes(results):
+        """
+        Estimate the resident size of fitted results without serializing them
+        
+        Nearly all of it is the per-observation state vectors and covariance
+        matrices kept by the Kalman filter and smoother, which share one
+        results object; arrays viewing the same buffer are counted once.
+        
+        Args:
+            results (ARIMAResults): Fitted results
+        
+        Returns:
+            int: Bytes
+        """
+        buffers = {}
+        for value in vars(results.filter_results).values():
+            if isinstance(value, np.ndarray):
+                base = value if value.base is None else value.base
+                if isinstance(base, np.ndarray):
+                    buffers[id(base)] = base.nbytes
+        return sum(buffers.values()) + np.asarray(results.params).nbytes + np.asarray(results.model.endog).nbytes
+    
+    def _strip(self, data):
+        """
+        Drop the fitted results, keeping only parameters and a short tail
+        
+        Args:
+            data (np.array): Series the model was fitted on
+        """
+        self.params = np.asarray(self.model_fit.params, dtype=np.float64)
+        self.tail = np.array(np.asarray(data)[-self.tail_length:], dtype=np.float64)
+        self.model = None
+        self.model_fit = None
+        self._nbytes = self.params.nbytes + self.tail.nbytes
+    
+    def _results(self):
+        """
+        Get results object to forecast from
+        
+        In lean mode the state is rebuilt by running the Kalman filter with
+        the stored parameters over the kept tail, which is cheap and gives
+        the same forecasts once the tail covers the model order.
+        
+        Returns:
+            ARIMAResults: Fitted or filtered results
+        """
+        if self.model_fit is not None:
+            return self.model_fit
+        if self.params is None:
+            raise ValueError("Model has not been trained yet")
+        return ARIMA(self.tail, order=self.order).filter(self.params)
+    
+    @property
+    def nbytes(self):
+        """
+        Approximate resident size of the model in bytes
+        """
+        return self._nbytes
+    
     def evaluate(self, test_data):
         """
         Evaluate model on test data
@@ -80,7 +164,10 @@ class ARIMAModel:
         """
         os.makedirs(os.path.dirname(filepath), exist_ok=True)
         with open(filepath, 'wb') as f:
-            pickle.dump(self.model_fit, f)
+            if self.model_fit is None:
+                pickle.dump({'order': self.order, 'params': self.params, 'tail': self.tail}, f)
+            else:
+                pickle.dump(self.model_fit, f)
     
     def load(self, filepath='models/arima_model.pkl'):
         """
@@ -90,4 +177,16 @@ class ARIMAModel:
             filepath (str): Path to load model from
         """
         with open(filepath, 'rb') as f:
-            self.model_fit = pickle.load(f)
+            saved = pickle.load(f)
+        
+        if isinstance(saved, dict):
+            self.order = saved['order']
+            self.params = saved['params']
+            self.tail = saved['tail']
+            self.model_fit = None
+            self._nbytes = self.params.nbytes + self.tail.nbytes
+        else:
+            self.model_fit = saved
+            self._nbytes = self._estimate_nbytes(self.model_fit)
+            if self.lean:
+                self._strip(self.model_fit.model.endog.ravel())
@@ -2,48 +2,124 @@
 """
 Module for loading stock data from Yahoo Finance
 """
-import yfinance as yf
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 
-def get_stock_data(symbol, period='90d', interval='1d'):
+from fetcher import default_fetcher, UpstreamUnavailable
+
+EMPTY_COLUMNS = ['Date', 'Open', 'High', 'Low', 'Close', 'Volume', 'Change', 'ChangePercent', 'Symbol']
+
+_fetcher = None
+
+def get_fetcher():
+    """
+    Get the upstream fetcher, created on first use
+    
+    Returns:
+        Fetcher: Shared rate-limited, batching fetcher
+    """
+    global _fetcher
+    if _fetcher is None:
+        _fetcher = default_fetcher()
+    return _fetcher
+
+def _format_frame(df, symbol, interval):
+    # Calculate additional metrics
+    df = df.copy()
+    df['Change'] = df['Close'] - df['Open']
+    df['ChangePercent'] = (df['Change'] / df['Open']) * 100
+    
+    # Reset index to make Date a column (intraday data is indexed by Datetime)
+    df = df.reset_index().rename(columns={'Datetime': 'Date', 'index': 'Date'})
+    
+    # Convert date to string format, keeping the time for intraday bars
+    df['Date'] = df['Date'].dt.strftime(date_format(interval))
+    
+    # Add symbol column
+    df['Symbol'] = symbol
+    
+    return df
+
+def _fetch_frame(symbol, period, interval, start, end):
+    if start is not None:
+        df = get_fetcher().fetch(symbol, interval=interval, start=start, end=end)
+    else:
+        df = get_fetcher().fetch(symbol, period=period, interval=interval)
+    
+    if df.empty:
+        raise ValueError(f"No data found for {symbol}")
+    return df
+
+def get_stock_data(symbol, period='90d', interval='1d', start=None, end=None):
     """
     Fetch stock data from Yahoo Finance
     
+    Concurrent calls for the same range are merged into one upstream request.
+    
     Args:
         symbol (str): Stock symbol
-        period (str): Period of data to fetch (e.g., '90d', '1y')
+        period (str): Period of data to fetch (e.g., '90d', '1y'), ignored
+            when start is given
         interval (str): Interval between data points (e.g., '1d', '1h')
+        start (str): First date to fetch ('YYYY-MM-DD'), inclusive
+        end (str): Last date to fetch ('YYYY-MM-DD'), exclusive
     
     Returns:
         pd.DataFrame: DataFrame with stock data
+    
+    Raises:
+        UpstreamUnavailable: If the upstream is down or throttling past the retry policy
     """
     try:
-        stock = yf.Ticker(symbol)
-        df = stock.history(period=period, interval=interval)
-        
-        if df.empty:
-            raise ValueError(f"No data found for {symbol}")
-            
-        # Calculate additional metrics
-        df['Change'] = df['Close'] - df['Open']
-        df['ChangePercent'] = (df['Change'] / df['Open']) * 100
-        
-        # Reset index to make Date a column
-        df = df.reset_index()
-        
-        # Convert date to string format
-        df['Date'] = df['Date'].dt.strftime('%Y-%m-%d')
-        
-        # Add symbol column
-        df['Symbol'] = symbol
-        
-        return df
+        return _format_frame(_fetch_frame(symbol, period, interval, start, end), symbol, interval)
+    except UpstreamUnavailable:
+        raise
     except Exception as e:
         print(f"Error fetching data for {symbol}: {e}")
         # Return empty DataFrame with expected columns
-        return pd.DataFrame(columns=['Date', 'Open', 'High', 'Low', 'Close', 'Volume', 'Change', 'ChangePercent', 'Symbol'])
+        return pd.DataFrame(columns=EMPTY_COLUMNS)
+
+def get_stock_bars(symbol, period='90d', interval='1d', start=None, end=None, dtype=np.float32):
+    """
+    Fetch stock data as compact price bars
+    
+    Like get_stock_data, but bar dates come straight from the upstream
+    index instead of being formatted as strings and parsed back.
+    
+    Args:
+        symbol (str): Stock symbol
+        period, interval, start, end: See get_stock_data
+        dtype (np.dtype): Storage dtype for price columns
+    
+    Returns:
+        PriceBars: Price history, empty if no data was found
+    
+    Raises:
+        UpstreamUnavailable: If the upstream is down or throttling past the retry policy
+    """
+    try:
+        df = _fetch_frame(symbol, period, interval, start, end)
+    except UpstreamUnavailable:
+        raise
+    except Exception as e:
+        print(f"Error fetching data for {symbol}: {e}")
+        df = None
+    return PriceBars.from_dataframe(df, symbol, dtype=dtype)
+
+def date_format(interval):
+    """
+    Get the date format for bars of an interval
+    
+    Args:
+        interval (str): Interval between data points (e.g., '1d', '1h')
+    
+    Returns:
+        str: strftime format
+    """
+    if interval.endswith(('d', 'wk', 'mo')):
+        return '%Y-%m-%d'
+    return '%Y-%m-%d %H:%M'
 
 def get_multiple_stocks_data(symbols, period='90d', interval='1d'):
     """
@@ -56,68 +132,196 @@ def get_multiple_stocks_data(symbols, period='90d', interval='1d'):
     
     Returns:
         dict: Dictionary with symbol as key and DataFrame as value
+    
+    Raises:
+        UpstreamUnavailable: If the upstream is down or throttling past the retry policy
     """
-    result = {}
+    # One bulk request per chunk of symbols, rate limited and retried by the fetcher
+    frames = get_fetcher().download(symbols, period=period, interval=interval)
     
-    # For efficiency, we can use yf.download for multiple symbols at once
-    if len(symbols) > 1:
-        try:
-            data = yf.download(symbols, period=period, interval=interval, group_by='ticker')
-            
-            for symbol in symbols:
-                if symbol in data.columns.levels[0]:
-                    # Extract data for this symbol
-                    df = data[symbol].reset_index()
-                    
-                    # Calculate additional metrics
-                    df['Change'] = df['Close'] - df['Open']
-                    df['ChangePercent'] = (df['Change'] / df['Open']) * 100
-                    
-                    # Convert date to string format
-                    df['Date'] = df['Date'].dt.strftime('%Y-%m-%d')
-                    
-                    # Add symbol column
-                    df['Symbol'] = symbol
-                    
-                    result[symbol] = df
-                else:
-                    print(f"No data found for {symbol}")
-                    result[symbol] = pd.DataFrame(columns=['Date', 'Open', 'High', 'Low', 'Close', 'Volume', 'Change', 'ChangePercent', 'Symbol'])
-        except Exception as e:
-            print(f"Error fetching data for multiple symbols: {e}")
-            # Fall back to individual fetching
-            for symbol in symbols:
-                result[symbol] = get_stock_data(symbol, period, interval)
-    else:
-        # For a single symbol, use the existing function
-        for symbol in symbols:
-            result[symbol] = get_stock_data(symbol, period, interval)
+    result = {}
+    for symbol in symbols:
+        df = frames.get(symbol)
+        if df is None or df.empty:
+            print(f"No data found for {symbol}")
+            result[symbol] = pd.DataFrame(columns=EMPTY_COLUMNS)
+        else:
+            result[symbol] = _format_frame(df, symbol, interval)
     
     return result
 
-# ... keep existing code (prepare_data_for_training function)
-
-def format_response_data(df):
+def get_multiple_stock_bars(symbols, period='90d', interval='1d', dtype=np.float32):
     """
-    Format data for frontend response
+    Fetch compact price bars for multiple stock symbols in bulk
     
     Args:
-        df (pd.DataFrame): DataFrame with stock data
+        symbols (list): List of stock symbols
+        period (str): Period of data to fetch
+        interval (str): Interval between data points
+        dtype (np.dtype): Storage dtype for price columns
     
     Returns:
-        list: List of dictionaries with formatted data
+        dict: Dictionary with symbol as key and PriceBars as value, empty
+            bars for symbols without data
+    
+    Raises:
+        UpstreamUnavailable: If the upstream is down or throttling past the retry policy
     """
-    result = []
-    for _, row in df.iterrows():
-        result.append({
-            'symbol': row.get('Symbol', 'N/A'),
-            'open': float(row['Open']),
-            'high': float(row['High']),
-            'low': float(row['Low']),
-            'close': float(row['Close']),
-            'volume': int(row['Volume']),
-            'date': row['Date'],
-            'change': float(row['Change']),
-            'changePercent': float(row['ChangePercent'])
-        })
-    return result
+    frames = get_fetcher().download(symbols, period=period, interval=interval)
+    return {symbol: PriceBars.from_dataframe(frames.get(symbol), symbol, dtype=dtype) for symbol in symbols}
+
+# ... keep existing code (prepare_data_for_training function)
+
+class PriceBars:
+    """
+    Compact columnar price history for a single symbol
+
+    Prices are stored as float32 arrays (or float64 when requested) and
+    dates as int64 epoch seconds, so no per-row Python objects or string
+    columns are kept resident.
+    """
+    __slots__ = ('symbol', 'dates', 'open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self, symbol, dates, open_, high, low, close, volume, dtype=np.float32):
+        """
+        Initialize price bars
+
+        Args:
+            symbol (str): Stock symbol
+            dates (np.array): Bar dates as epoch seconds
+            open_, high, low, close (np.array): Price columns
+            volume (np.array): Traded volume
+            dtype (np.dtype): Storage dtype for price columns
+        """
+        self.symbol = symbol
+        self.dates = np.ascontiguousarray(dates, dtype=np.int64)
+        self.open = np.ascontiguousarray(open_, dtype=dtype)
+        self.high = np.ascontiguousarray(high, dtype=dtype)
+        self.low = np.ascontiguousarray(low, dtype=dtype)
+        self.close = np.ascontiguousarray(close, dtype=dtype)
+        self.volume = np.ascontiguousarray(volume, dtype=np.int64)
+
+    @classmethod
+    def from_dataframe(cls, df, symbol, dtype=np.float32):
+        """
+        Build price bars from a raw upstream frame indexed by date
+
+        Rows without a close, such as gaps left by aligning a bulk download
+        across symbols, are dropped. Timezone-aware dates keep their exchange
+        wall-clock time, so daily bars fall on midnight.
+
+        Args:
+            df (pd.DataFrame): Bars as returned by the fetcher, or None
+            symbol (str): Stock symbol
+            dtype (np.dtype): Storage dtype for price columns
+
+        Returns:
+            PriceBars: Compact price history
+        """
+        if df is None:
+            df = pd.DataFrame(columns=['Open', 'High', 'Low', 'Close', 'Volume'], index=pd.DatetimeIndex([]))
+        df = df.dropna(subset=['Close'])
+        index = pd.DatetimeIndex(df.index)
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        return cls(
+            symbol,
+            index.values.astype('datetime64[s]').astype(np.int64),
+            df['Open'].values,
+            df['High'].values,
+            df['Low'].values,
+            df['Close'].values,
+            df['Volume'].values,
+            dtype=dtype
+        )
+
+    def __len__(self):
+        return len(self.dates)
+
+    def __getitem__(self, index):
+        """
+        Slice bars, sharing the underlying arrays
+
+        Args:
+            index (slice): Bar range to select
+
+        Returns:
+            PriceBars: Bars in the range
+        """
+        if not isinstance(index, slice):
+            raise TypeError("PriceBars only supports slicing")
+        bars = PriceBars.__new__(PriceBars)
+        bars.symbol = self.symbol
+        for name in ('dates', 'open', 'high', 'low', 'close', 'volume'):
+            setattr(bars, name, getattr(self, name)[index])
+        return bars
+
+    def take(self, indices):
+        """
+        Select bars by position
+
+        Args:
+            indices (np.array): Bar positions, increasing
+
+        Returns:
+            PriceBars: Selected bars
+        """
+        return PriceBars(self.symbol, self.dates[indices], self.open[indices], self.high[indices],
+                         self.low[indices], self.close[indices], self.volume[indices],
+                         dtype=self.close.dtype)
+
+    def between(self, start=None, end=None):
+        """
+        Select bars within a date range without copying
+
+        Args:
+            start (int): First epoch second to include, or None for no lower bound
+            end (int): Last epoch second to include, or None for no upper bound
+
+        Returns:
+            PriceBars: Bars in the range
+        """
+        lo = 0 if start is None else int(np.searchsorted(self.dates, start, side='left'))
+        hi = len(self.dates) if end is None else int(np.searchsorted(self.dates, end, side='right'))
+        return self[lo:hi]
+
+    @property
+    def empty(self):
+        return len(self.dates) == 0
+
+    @property
+    def nbytes(self):
+        """
+        Total bytes held by the bar arrays
+        """
+        return sum(getattr(self, name).nbytes for name in ('dates', 'open', 'high', 'low', 'close', 'volume'))
+
+    def to_records(self):
+        """
+        Format bars for frontend response
+
+        Returns:
+            list: One dictionary per bar with symbol, prices, volume, date and change
+        """
+        open_ = self.open.astype(np.float64)
+        close = self.close.astype(np.float64)
+        change = close - open_
+        change_percent = change / open_ * 100
+        # Daily bars fall on midnight; anything else is intraday and keeps its time
+        unit = 'D' if np.all(self.dates % 86400 == 0) else 'm'
+        dates = np.char.replace(np.datetime_as_string(self.dates.astype('datetime64[s]'), unit=unit), 'T', ' ')
+
+        columns = {
+            'open': np.round(open_, 4).tolist(),
+            'high': np.round(self.high.astype(np.float64), 4).tolist(),
+            'low': np.round(self.low.astype(np.float64), 4).tolist(),
+            'close': np.round(close, 4).tolist(),
+            'volume': self.volume.tolist(),
+            'date': dates.tolist(),
+            'change': np.round(change, 4).tolist(),
+            'changePercent': np.round(change_percent, 4).tolist()
+        }
+        return [
+            dict(symbol=self.symbol, **{key: values[i] for key, values in columns.items()})
+            for i in range(len(self.dates))
+        ]
@@ -0,0 +1,136 @@
+"""
+Shape-preserving downsampling of price bars for charting
+"""
+import numpy as np
+
+DOWNSAMPLE_METHODS = ('lttb', 'ohlc')
+
+
+def bucket_edges(length, buckets):
+    """
+    Split a range into roughly equal contiguous buckets
+
+    Args:
+        length (int): Number of points
+        buckets (int): Number of buckets
+
+    Returns:
+        np.array: Bucket start offsets followed by the final end offset
+    """
+    return np.unique(np.linspace(0, length, buckets + 1).astype(np.int64))
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Select points with Largest-Triangle-Three-Buckets
+
+    The first and last points are always kept (only the last when n_out is
+    1). Each interior bucket keeps the point forming the largest triangle
+    with the previously kept point and the average of the next bucket.
+    Bucket averages and per-bucket areas are computed with array ops; only
+    the walk over buckets is sequential.
+
+    Args:
+        x (np.array): Point x coordinates, increasing
+        y (np.array): Point y coordinates
+        n_out (int): Number of points to keep
+
+    Returns:
+        np.array: Indices of kept points, increasing
+    """
+    n = len(x)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 3:
+        # Too few points for an interior bucket: keep the endpoints, or just the latest point
+        return np.array([0, n - 1] if n_out == 2 else [n - 1], dtype=np.int64)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    # Interior points split into n_out - 2 buckets
+    edges = 1 + bucket_edges(n - 2, n_out - 2)
+    starts, ends = edges[:-1], edges[1:]
+
+    # Average of each bucket, with the last point acting as the bucket after the last
+    counts = ends - starts
+    avg_x = np.append(np.add.reduceat(x[1:n - 1], starts - 1) / counts, x[-1])
+    avg_y = np.append(np.add.reduceat(y[1:n - 1], starts - 1) / counts, y[-1])
+
+    selected = np.empty(len(starts) + 2, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    prev = 0
+    for i, (start, end) in enumerate(zip(starts, ends)):
+        bx, by = x[start:end], y[start:end]
+        areas = np.abs((x[prev] - avg_x[i + 1]) * (by - y[prev])
+                       - (x[prev] - bx) * (avg_y[i + 1] - y[prev]))
+        prev = start + int(np.argmax(areas))
+        selected[i + 1] = prev
+    return selected
+
+
+def lttb_bars(bars, n_out):
+    """
+    Downsample bars by keeping the LTTB-selected closes
+
+    Args:
+        bars (PriceBars): Price history
+        n_out (int): Maximum number of bars to return
+
+    Returns:
+        PriceBars: Subset of the original bars
+    """
+    return bars.take(lttb_indices(bars.dates, bars.close, n_out))
+
+
+def ohlc_bars(bars, n_out):
+    """
+    Downsample bars by aggregating contiguous buckets into single bars
+
+    Each bucket keeps the first open and date, the last close, the highest
+    high, the lowest low and the total volume.
+
+    Args:
+        bars (PriceBars): Price history
+        n_out (int): Maximum number of bars to return
+
+    Returns:
+        PriceBars: Aggregated bars
+    """
+    if n_out >= len(bars):
+        return bars
+    edges = bucket_edges(len(bars), n_out)
+    starts, ends = edges[:-1], edges[1:]
+    return type(bars)(
+        bars.symbol,
+        bars.dates[starts],
+        bars.open[starts],
+        np.maximum.reduceat(bars.high, starts),
+        np.minimum.reduceat(bars.low, starts),
+        bars.close[ends - 1],
+        np.add.reduceat(bars.volume, starts),
+        dtype=bars.close.dtype
+    )
+
+
+def downsample(bars, max_points, method='lttb'):
+    """
+    Downsample bars to at most max_points
+
+    Args:
+        bars (PriceBars): Price history
+        max_points (int): Maximum number of bars to return
+        method (str): 'lttb' to keep representative original bars, or 'ohlc'
+            to aggregate buckets into candles
+
+    Returns:
+        PriceBars: Downsampled bars
+    """
+    if method not in DOWNSAMPLE_METHODS:
+        raise ValueError(f"Unknown downsampling method {method!r}, expected one of {DOWNSAMPLE_METHODS}")
+    if max_points >= len(bars):
+        return bars
+    if method == 'ohlc':
+        return ohlc_bars(bars, max_points)
+    return lttb_bars(bars, max_points)
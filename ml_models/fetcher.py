@@ -0,0 +1,491 @@
+"""
+Upstream price fetching with connection reuse, rate limiting, retries and micro-batching
+
+Concurrent single-symbol requests arriving within a short window are merged
+into one bulk download. Every upstream call goes through a token-bucket rate
+limiter, retries with jittered exponential backoff, and a circuit breaker
+that fails fast while the upstream is unhealthy.
+
+Two backends are available: Yahoo Finance through yfinance, and a plain
+HTTP/JSON backend selected with UPSTREAM_URL, which is also what lets the
+fetch layer run against a local stub server.
+"""
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+import pandas as pd
+
+
+class UpstreamUnavailable(Exception):
+    """
+    Raised when the upstream cannot be reached within the retry policy or
+    the circuit breaker is open
+    """
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class UpstreamRequestError(Exception):
+    """
+    Raised by a backend when the upstream rejects a request as invalid
+
+    Such errors are final: they are not retried and do not count against
+    the circuit breaker.
+    """
+
+
+class TokenBucket:
+    """
+    Thread-safe token-bucket rate limiter
+    """
+
+    def __init__(self, rate, capacity):
+        """
+        Initialize token bucket
+
+        Args:
+            rate (float): Tokens added per second
+            capacity (int): Maximum burst size
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout=None):
+        """
+        Take one token, waiting for it if necessary
+
+        Args:
+            timeout (float): Maximum seconds to wait, or None to wait indefinitely
+
+        Returns:
+            bool: True if a token was taken, False on timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if deadline is not None and now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker that opens after consecutive failures
+
+    While open, calls fail immediately. After reset_timeout one trial call is
+    let through; its success closes the circuit, its failure reopens it.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        """
+        Initialize circuit breaker
+
+        Args:
+            failure_threshold (int): Consecutive failures that open the circuit
+            reset_timeout (float): Seconds to stay open before a trial call
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return 'closed'
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return 'half-open'
+            return 'open'
+
+    def allow(self):
+        """
+        Check whether a call may proceed
+
+        Returns:
+            bool: True if the call may proceed
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._trial_running:
+                return False
+            self._trial_running = True
+            return True
+
+    def retry_after(self):
+        """
+        Get seconds until the next trial call is allowed
+
+        Returns:
+            float: Seconds, 0 if the circuit is closed
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return 0.0
+            return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_running or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial_running = False
+
+
+class YahooBackend:
+    """
+    Bulk downloads from Yahoo Finance over one reused HTTP session
+    """
+
+    # Per-ticker errors that yfinance records instead of raising, worth retrying
+    TRANSIENT_ERRORS = ('RateLimit', 'Too Many Requests', '429', 'Timeout', 'timed out', 'Connection',
+                        'Internal Server Error', 'Bad Gateway', 'Service Unavailable', 'Gateway Time')
+
+    def __init__(self):
+        import yfinance as yf
+        self._yf = yf
+        self.session = self._create_session()
+        # yfinance reports per-ticker errors through module globals reset on each download
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _create_session():
+        # Recent yfinance versions only accept curl_cffi sessions
+        try:
+            from curl_cffi import requests as curl_requests
+            return curl_requests.Session(impersonate='chrome')
+        except ImportError:
+            import requests
+            return requests.Session()
+
+    def download(self, symbols, period=None, interval='1d', start=None, end=None):
+        """
+        Download bars for several symbols in one request
+
+        Args:
+            symbols (list): Stock symbols
+            period (str): Period of data, ignored when start is given
+            interval (str): Interval between data points
+            start (str): First date, inclusive
+            end (str): Last date, exclusive
+
+        Returns:
+            dict: Raw DataFrame indexed by date per symbol; missing symbols are omitted
+
+        Raises:
+            IOError: If any symbol failed with a throttling or transient error
+        """
+        # Adjusted prices, matching Ticker.history
+        kwargs = {'interval': interval, 'group_by': 'ticker', 'progress': False,
+                  'threads': False, 'session': self.session, 'auto_adjust': True}
+        if start is not None:
+            kwargs.update(start=start, end=end)
+        else:
+            kwargs['period'] = period
+        with self._lock:
+            data = self._yf.download(list(symbols), **kwargs)
+            errors = dict(self._yf.shared._ERRORS)
+
+        transient = {symbol: error for symbol, error in errors.items()
+                     if any(marker in error for marker in self.TRANSIENT_ERRORS)}
+        if transient:
+            raise IOError(f"Yahoo Finance failed for {', '.join(sorted(transient))}: {next(iter(transient.values()))}")
+
+        result = {}
+        if data is None or data.empty:
+            return result
+        for symbol in symbols:
+            if isinstance(data.columns, pd.MultiIndex):
+                if symbol not in data.columns.get_level_values(0):
+                    continue
+                df = data[symbol]
+            else:
+                df = data
+            df = df.dropna(subset=['Close'])
+            if not df.empty:
+                result[symbol] = df
+        return result
+
+
+class HTTPBackend:
+    """
+    Bulk downloads from a JSON HTTP endpoint over a pooled session
+
+    GET {base_url}/download?symbols=AAPL,MSFT&period=90d&interval=1d returns
+    {"AAPL": [{"Date": "2024-01-02", "Open": ..., "High": ..., "Low": ...,
+    "Close": ..., "Volume": ...}, ...], ...}. Symbols without data may be
+    omitted or map to an empty list.
+    """
+
+    def __init__(self, base_url, pool_size=10, timeout=10.0):
+        """
+        Initialize HTTP backend
+
+        Args:
+            base_url (str): Upstream base URL, e.g. http://localhost:8000
+            pool_size (int): Maximum pooled connections
+            timeout (float): Request timeout in seconds
+        """
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def download(self, symbols, period=None, interval='1d', start=None, end=None):
+        """
+        Download bars for several symbols in one request
+
+        See YahooBackend.download.
+        """
+        params = {'symbols': ','.join(symbols), 'interval': interval}
+        if start is not None:
+            params.update(start=start, end=end)
+        else:
+            params['period'] = period
+        response = self.session.get(f'{self.base_url}/download', params=params, timeout=self.timeout)
+        # Throttling and server errors are retried; other client errors are final
+        if response.status_code == 429 or response.status_code >= 500:
+            raise IOError(f"Upstream returned HTTP {response.status_code}")
+        if response.status_code >= 400:
+            raise UpstreamRequestError(f"Upstream rejected request with HTTP {response.status_code}")
+
+        result = {}
+        for symbol, rows in response.json().items():
+            if not rows:
+                continue
+            df = pd.DataFrame(rows)
+            df.index = pd.DatetimeIndex(pd.to_datetime(df.pop('Date')), name='Date')
+            result[symbol] = df
+        return result
+
+
+class Fetcher:
+    """
+    Rate-limited, retrying, micro-batching front end for a backend
+    """
+
+    def __init__(self, backend, rate=2.0, burst=5, max_retries=3, backoff_base=0.5,
+                 backoff_cap=8.0, batch_window=0.025, max_batch=50, breaker=None, batch_workers=4):
+        """
+        Initialize fetcher
+
+        Args:
+            backend (YahooBackend or HTTPBackend): Upstream backend
+            rate (float): Upstream calls per second
+            burst (int): Maximum burst of upstream calls
+            max_retries (int): Retries after the first failed attempt
+            backoff_base (float): Base delay for exponential backoff in seconds
+            backoff_cap (float): Maximum backoff delay in seconds
+            batch_window (float): Seconds to collect single-symbol requests into a batch
+            max_batch (int): Maximum symbols per upstream call
+            breaker (CircuitBreaker): Circuit breaker, a default one if None
+            batch_workers (int): Batches run concurrently, so one batch waiting
+                out its retries does not hold up the others
+        """
+        self.backend = backend
+        self.limiter = TokenBucket(rate, burst)
+        self.breaker = breaker or CircuitBreaker()
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.batch_workers = batch_workers
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        # (period, interval, start, end) -> symbol -> Future
+        self._pending = {}
+        self._dispatcher = None
+        self._dispatcher_pid = None
+        self._executor = None
+        self.upstream_calls = 0
+
+    def download(self, symbols, period=None, interval='1d', start=None, end=None):
+        """
+        Download several symbols directly, applying the retry policy
+
+        Args:
+            symbols (list): Stock symbols
+            period, interval, start, end: See YahooBackend.download
+
+        Returns:
+            dict: Raw DataFrame per symbol with data; symbols the upstream
+                rejects are omitted
+
+        Raises:
+            UpstreamUnavailable: If the circuit is open or all retries failed
+        """
+        result = {}
+        symbols = list(symbols)
+        for i in range(0, len(symbols), self.max_batch):
+            chunk = symbols[i:i + self.max_batch]
+            result.update(self._call_isolated(chunk, period, interval, start, end))
+        return result
+
+    def _call_isolated(self, symbols, period, interval, start, end):
+        try:
+            return self._call(symbols, period, interval, start, end)
+        except UpstreamRequestError as e:
+            if len(symbols) == 1:
+                print(f"Upstream rejected {symbols[0]}: {e}")
+                return {}
+        # One invalid symbol must not fail the others in its batch
+        result = {}
+        for symbol in symbols:
+            result.update(self._call_isolated([symbol], period, interval, start, end))
+        return result
+
+    def _call(self, symbols, period, interval, start, end):
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            if not self.breaker.allow():
+                raise UpstreamUnavailable('Upstream circuit is open', retry_after=self.breaker.retry_after())
+            self.limiter.acquire()
+            try:
+                with self._lock:
+                    self.upstream_calls += 1
+                result = self.backend.download(symbols, period=period, interval=interval, start=start, end=end)
+                self.breaker.record_success()
+                return result
+            except UpstreamRequestError:
+                # The upstream answered, so it is healthy
+                self.breaker.record_success()
+                raise
+            except Exception as e:
+                self.breaker.record_failure()
+                last_error = e
+                if attempt < self.max_retries:
+                    # Full jitter spreads retries from concurrent callers apart
+                    delay = random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+                    print(f"Upstream error for {','.join(symbols)}, retrying in {delay:.2f}s: {e}")
+                    time.sleep(delay)
+        raise UpstreamUnavailable(f'Upstream failed after {self.max_retries + 1} attempts: {last_error}',
+                                  retry_after=self.breaker.retry_after() or None)
+
+    def fetch(self, symbol, period=None, interval='1d', start=None, end=None, timeout=60.0):
+        """
+        Fetch one symbol, batched with concurrent requests for the same range
+
+        Args:
+            symbol (str): Stock symbol
+            period, interval, start, end: See YahooBackend.download
+            timeout (float): Maximum seconds to wait for the batch
+
+        Returns:
+            pd.DataFrame: Raw bars indexed by date, empty if the symbol has no data
+
+        Raises:
+            UpstreamUnavailable: If the upstream call for the batch failed or timed out
+        """
+        key = (period, interval, start, end)
+        with self._lock:
+            self._ensure_dispatcher()
+            group = self._pending.setdefault(key, {})
+            future = group.get(symbol)
+            if future is None:
+                future = group[symbol] = Future()
+                self._wakeup.notify()
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeout:
+            raise UpstreamUnavailable(f'Timed out after {timeout:.0f}s waiting for upstream data for {symbol}')
+
+    def _ensure_dispatcher(self):
+        # Threads do not survive fork, so a forked worker starts its own
+        if self._dispatcher is None or self._dispatcher_pid != os.getpid():
+            self._dispatcher_pid = os.getpid()
+            self._executor = ThreadPoolExecutor(max_workers=self.batch_workers, thread_name_prefix='fetch-batch')
+            self._dispatcher = threading.Thread(target=self._dispatch_loop, name='fetch-dispatcher', daemon=True)
+            self._dispatcher.start()
+
+    def _dispatch_loop(self):
+        while True:
+            with self._lock:
+                while not self._pending:
+                    self._wakeup.wait()
+            # Let concurrent requests join the batch
+            time.sleep(self.batch_window)
+            with self._lock:
+                batches, self._pending = self._pending, {}
+
+            for key, futures in batches.items():
+                self._executor.submit(self._run_batch, key, futures)
+
+    def _run_batch(self, key, futures):
+        period, interval, start, end = key
+        try:
+            frames = self.download(list(futures), period=period, interval=interval, start=start, end=end)
+        except Exception as e:
+            for future in futures.values():
+                future.set_exception(e)
+            return
+        for symbol, future in futures.items():
+            future.set_result(frames.get(symbol, pd.DataFrame()))
+
+    def status(self):
+        """
+        Report fetcher health
+
+        Returns:
+            dict: Circuit state and upstream call count
+        """
+        return {'circuit': self.breaker.state, 'upstreamCalls': self.upstream_calls}
+
+
+_default_fetcher = None
+_default_lock = threading.Lock()
+
+
+def default_fetcher():
+    """
+    Get the process-wide fetcher configured from the environment
+
+    UPSTREAM_URL selects the HTTP backend (Yahoo Finance otherwise);
+    UPSTREAM_RATE, UPSTREAM_BURST and UPSTREAM_BATCH_WINDOW_MS tune the
+    rate limit and batching window.
+
+    Returns:
+        Fetcher: Shared fetcher
+    """
+    global _default_fetcher
+    with _default_lock:
+        if _default_fetcher is None:
+            url = os.environ.get('UPSTREAM_URL')
+            backend = HTTPBackend(url) if url else YahooBackend()
+            _default_fetcher = Fetcher(
+                backend,
+                rate=float(os.environ.get('UPSTREAM_RATE', '2')),
+                burst=int(os.environ.get('UPSTREAM_BURST', '5')),
+                batch_window=float(os.environ.get('UPSTREAM_BATCH_WINDOW_MS', '25')) / 1000
+            )
+        return _default_fetcher
@@ -0,0 +1,12 @@
+"""
+Gunicorn settings for the prediction API, picked up when gunicorn is started
+from this directory:
+    gunicorn -w 4 api:app
+"""
+
+
+def post_worker_init(worker):
+    # Warm up in each worker after fork, with or without --preload, so the
+    # master never builds Keras models or starts threads the workers would inherit
+    import api
+    api.start_worker(notify=worker.notify)
@@ -0,0 +1,351 @@
+"""
+Technical indicators computed over history and updated incrementally per bar
+"""
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+INDICATOR_COLUMNS = (
+    'sma', 'ema', 'rsi', 'macd', 'macdSignal', 'macdHist',
+    'bollingerUpper', 'bollingerMiddle', 'bollingerLower', 'atr', 'volumeZ'
+)
+
+
+def compute_indicators(bars, sma_period=20, ema_period=20, rsi_period=14,
+                       macd_periods=(12, 26, 9), bollinger_period=20, bollinger_width=2.0,
+                       atr_period=14, volume_period=20):
+    """
+    Compute indicators over a full price history
+
+    EMAs use the recursive form seeded with the first value, and RSI and ATR
+    use Wilder smoothing, so IndicatorState.update continues these series
+    exactly.
+
+    Args:
+        bars (PriceBars): Price history
+        sma_period (int): Simple moving average window
+        ema_period (int): Exponential moving average span
+        rsi_period (int): RSI smoothing period
+        macd_periods (tuple): MACD fast span, slow span and signal span
+        bollinger_period (int): Bollinger band window
+        bollinger_width (float): Bollinger band width in standard deviations
+        atr_period (int): ATR smoothing period
+        volume_period (int): Window for volume z-scores
+
+    Returns:
+        pd.DataFrame: One column per name in INDICATOR_COLUMNS, one row per bar
+    """
+    close = pd.Series(bars.close, dtype=np.float64)
+    high = pd.Series(bars.high, dtype=np.float64)
+    low = pd.Series(bars.low, dtype=np.float64)
+    volume = pd.Series(bars.volume, dtype=np.float64)
+    fast, slow, signal = macd_periods
+
+    delta = close.diff().fillna(0.0)
+    avg_gain = delta.clip(lower=0).ewm(alpha=1 / rsi_period, adjust=False).mean()
+    avg_loss = (-delta).clip(lower=0).ewm(alpha=1 / rsi_period, adjust=False).mean()
+
+    macd = (close.ewm(span=fast, adjust=False).mean()
+            - close.ewm(span=slow, adjust=False).mean())
+    macd_signal = macd.ewm(span=signal, adjust=False).mean()
+
+    middle = close.rolling(bollinger_period).mean()
+    std = close.rolling(bollinger_period).std(ddof=0)
+
+    prev_close = close.shift(1).fillna(close)
+    true_range = pd.concat([high - low, (high - prev_close).abs(), (low - prev_close).abs()], axis=1).max(axis=1)
+
+    volume_mean = volume.rolling(volume_period).mean()
+    volume_std = volume.rolling(volume_period).std(ddof=0)
+
+    return pd.DataFrame({
+        'sma': close.rolling(sma_period).mean(),
+        'ema': close.ewm(span=ema_period, adjust=False).mean(),
+        'rsi': _rsi(avg_gain.values, avg_loss.values),
+        'macd': macd,
+        'macdSignal': macd_signal,
+        'macdHist': macd - macd_signal,
+        'bollingerUpper': middle + bollinger_width * std,
+        'bollingerMiddle': middle,
+        'bollingerLower': middle - bollinger_width * std,
+        'atr': true_range.ewm(alpha=1 / atr_period, adjust=False).mean(),
+        'volumeZ': _zscore(volume.values, volume_mean.values, volume_std.values),
+    })
+
+
+def _rsi(avg_gain, avg_loss):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = 100 - 100 / (1 + avg_gain / avg_loss)
+    # No losses in the window means maximum strength; a flat window is neutral
+    rsi = np.where(avg_loss == 0, np.where(avg_gain == 0, 50.0, 100.0), rsi)
+    return rsi
+
+
+def _zscore(value, mean, std):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = (value - mean) / std
+    return np.where(std == 0, 0.0, z)
+
+
+class _Window:
+    """
+    Fixed-size ring buffer keeping a running sum and sum of squares
+    """
+    __slots__ = ('values', 'pos', 'count', 'total', 'total_sq')
+
+    def __init__(self, size):
+        self.values = np.zeros(size, dtype=np.float64)
+        self.pos = 0
+        self.count = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def peek(self, value):
+        """
+        Get (count, sum, sum of squares) as if value were pushed
+        """
+        size = len(self.values)
+        if self.count == size:
+            oldest = self.values[self.pos]
+            return (size, self.total - oldest + value,
+                    self.total_sq - oldest * oldest + value * value)
+        return self.count + 1, self.total + value, self.total_sq + value * value
+
+    def push(self, value):
+        self.count, self.total, self.total_sq = self.peek(value)
+        self.values[self.pos] = value
+        self.pos = (self.pos + 1) % len(self.values)
+
+    def stats(self, count, total, total_sq):
+        """
+        Get (mean, population std) from peeked sums, or NaNs while filling
+        """
+        if count < len(self.values):
+            return np.nan, np.nan
+        mean = total / count
+        return mean, np.sqrt(max(total_sq / count - mean * mean, 0.0))
+
+
+class IndicatorState:
+    """
+    Running indicator state for one symbol, updated in O(1) per new bar
+    """
+    __slots__ = (
+        'symbol', 'last_date', 'prev_close', 'ema', 'ema_fast', 'ema_slow', 'macd_signal',
+        'avg_gain', 'avg_loss', 'atr', 'sma_window', 'bollinger_window', 'volume_window',
+        'params', 'recent_dates', 'recent_rows'
+    )
+
+    def __init__(self, symbol, sma_period=20, ema_period=20, rsi_period=14,
+                 macd_periods=(12, 26, 9), bollinger_period=20, bollinger_width=2.0,
+                 atr_period=14, volume_period=20, history=250):
+        """
+        Initialize empty indicator state
+
+        Args:
+            symbol (str): Stock symbol
+            sma_period, ema_period, rsi_period, macd_periods, bollinger_period,
+                bollinger_width, atr_period, volume_period: See compute_indicators
+            history (int): Number of recent indicator rows kept for lookups
+        """
+        self.symbol = symbol
+        self.params = {
+            'sma_period': sma_period, 'ema_period': ema_period, 'rsi_period': rsi_period,
+            'macd_periods': macd_periods, 'bollinger_period': bollinger_period,
+            'bollinger_width': bollinger_width, 'atr_period': atr_period,
+            'volume_period': volume_period,
+        }
+        self.last_date = None
+        self.prev_close = None
+        self.ema = self.ema_fast = self.ema_slow = self.macd_signal = None
+        self.avg_gain = self.avg_loss = self.atr = None
+        self.sma_window = _Window(sma_period)
+        self.bollinger_window = _Window(bollinger_period)
+        self.volume_window = _Window(volume_period)
+        self.recent_dates = deque(maxlen=history)
+        self.recent_rows = deque(maxlen=history)
+
+    @classmethod
+    def from_history(cls, bars, **params):
+        """
+        Build state from a full history using the vectorized computation
+
+        Callers usually pass all but the latest bar and then call advance
+        with the full history, so an in-progress bar is never committed.
+
+        Args:
+            bars (PriceBars): Price history
+            **params: Indicator parameters, see IndicatorState.__init__
+
+        Returns:
+            IndicatorState: State positioned after the last bar
+        """
+        state = cls(bars.symbol, **params)
+        if bars.empty:
+            return state
+
+        history = state.recent_rows.maxlen
+        frame = compute_indicators(bars, **state.params)
+        values = frame.values
+        for date, row in zip(bars.dates[-history:].tolist(), values[-history:]):
+            state.recent_dates.append(date)
+            state.recent_rows.append(row)
+
+        close = bars.close.astype(np.float64)
+        fast, slow, _ = state.params['macd_periods']
+        state.last_date = int(bars.dates[-1])
+        state.prev_close = float(close[-1])
+        state.ema = float(frame['ema'].iloc[-1])
+        state.ema_fast = float(pd.Series(close).ewm(span=fast, adjust=False).mean().iloc[-1])
+        state.ema_slow = float(pd.Series(close).ewm(span=slow, adjust=False).mean().iloc[-1])
+        state.macd_signal = float(frame['macdSignal'].iloc[-1])
+        state.atr = float(frame['atr'].iloc[-1])
+
+        rsi_period = state.params['rsi_period']
+        delta = np.diff(close, prepend=close[0])
+        state.avg_gain = float(pd.Series(np.clip(delta, 0, None)).ewm(alpha=1 / rsi_period, adjust=False).mean().iloc[-1])
+        state.avg_loss = float(pd.Series(np.clip(-delta, 0, None)).ewm(alpha=1 / rsi_period, adjust=False).mean().iloc[-1])
+
+        volume = bars.volume.astype(np.float64)
+        for window, series in ((state.sma_window, close), (state.bollinger_window, close),
+                               (state.volume_window, volume)):
+            for value in series[-len(window.values):]:
+                window.push(float(value))
+        return state
+
+    def update(self, date, high, low, close, volume, commit=True):
+        """
+        Advance the indicators by one bar
+
+        Args:
+            date (int): Bar date as epoch seconds
+            high, low, close (float): Bar prices
+            volume (float): Bar volume
+            commit (bool): Apply the bar to the state; pass False to evaluate a
+                bar that may still change, such as today's in-progress bar
+
+        Returns:
+            np.array: Indicator values in INDICATOR_COLUMNS order
+        """
+        p = self.params
+        fast, slow, signal = p['macd_periods']
+        close, high, low, volume = float(close), float(high), float(low), float(volume)
+
+        if self.prev_close is None:
+            prev_close = close
+            ema = ema_fast = ema_slow = close
+            macd_signal = 0.0
+            avg_gain = avg_loss = 0.0
+            atr = high - low
+        else:
+            prev_close = self.prev_close
+            ema = _ema_step(self.ema, close, 2 / (p['ema_period'] + 1))
+            ema_fast = _ema_step(self.ema_fast, close, 2 / (fast + 1))
+            ema_slow = _ema_step(self.ema_slow, close, 2 / (slow + 1))
+            macd_signal = _ema_step(self.macd_signal, ema_fast - ema_slow, 2 / (signal + 1))
+            change = close - prev_close
+            avg_gain = _ema_step(self.avg_gain, max(change, 0.0), 1 / p['rsi_period'])
+            avg_loss = _ema_step(self.avg_loss, max(-change, 0.0), 1 / p['rsi_period'])
+            true_range = max(high - low, abs(high - prev_close), abs(low - prev_close))
+            atr = _ema_step(self.atr, true_range, 1 / p['atr_period'])
+        macd = ema_fast - ema_slow
+
+        sma_sums = self.sma_window.peek(close)
+        bollinger_sums = self.bollinger_window.peek(close)
+        volume_sums = self.volume_window.peek(volume)
+        sma, _ = self.sma_window.stats(*sma_sums)
+        middle, std = self.bollinger_window.stats(*bollinger_sums)
+        volume_mean, volume_std = self.volume_window.stats(*volume_sums)
+        width = p['bollinger_width']
+
+        row = np.array([
+            sma, ema, float(_rsi(np.float64(avg_gain), np.float64(avg_loss))),
+            macd, macd_signal, macd - macd_signal,
+            middle + width * std, middle, middle - width * std,
+            atr, float(_zscore(volume, volume_mean, volume_std)),
+        ])
+
+        if commit:
+            self.last_date = int(date)
+            self.prev_close = close
+            self.ema, self.ema_fast, self.ema_slow = ema, ema_fast, ema_slow
+            self.macd_signal = macd_signal
+            self.avg_gain, self.avg_loss, self.atr = avg_gain, avg_loss, atr
+            self.sma_window.push(close)
+            self.bollinger_window.push(close)
+            self.volume_window.push(volume)
+            self.recent_dates.append(int(date))
+            self.recent_rows.append(row)
+        return row
+
+    def advance(self, bars):
+        """
+        Apply bars newer than the state, leaving the latest bar provisional
+
+        The latest bar is evaluated without committing, since its values can
+        still change during the trading day.
+
+        Args:
+            bars (PriceBars): Price history overlapping or following the state
+
+        Returns:
+            tuple: Dates (list) and indicator rows (np.array) for recent bars,
+                including the provisional latest bar
+        """
+        start = 0 if self.last_date is None else int(np.searchsorted(bars.dates, self.last_date, side='right'))
+        for i in range(start, len(bars) - 1):
+            self.update(bars.dates[i], bars.high[i], bars.low[i], bars.close[i], bars.volume[i])
+
+        dates = list(self.recent_dates)
+        rows = list(self.recent_rows)
+        if start < len(bars):
+            last = len(bars) - 1
+            dates.append(int(bars.dates[last]))
+            rows.append(self.update(bars.dates[last], bars.high[last], bars.low[last],
+                                    bars.close[last], bars.volume[last], commit=False))
+        return dates, np.array(rows).reshape(-1, len(INDICATOR_COLUMNS))
+
+    @property
+    def nbytes(self):
+        """
+        Approximate resident size of the state in bytes
+        """
+        windows = self.sma_window.values.nbytes + self.bollinger_window.values.nbytes + self.volume_window.values.nbytes
+        return windows + len(self.recent_rows) * (len(INDICATOR_COLUMNS) + 1) * 8
+
+
+def _ema_step(previous, value, alpha):
+    return previous + alpha * (value - previous)
+
+
+def select_features(rows, columns):
+    """
+    Select indicator columns to use as model features
+
+    Args:
+        rows (np.array): Indicator rows in INDICATOR_COLUMNS order
+        columns (list): Indicator names to keep
+
+    Returns:
+        np.array: Feature matrix of shape (len(rows), len(columns))
+    """
+    indices = [INDICATOR_COLUMNS.index(column) for column in columns]
+    return np.asarray(rows, dtype=np.float64)[:, indices]
+
+
+def drop_warmup(data, features):
+    """
+    Drop leading rows where any feature is still warming up
+
+    Args:
+        data (np.array): Series aligned with features
+        features (np.array): Feature rows, NaN until each indicator has enough history
+
+    Returns:
+        tuple: Trimmed data and features
+    """
+    features = np.asarray(features, dtype=np.float64)
+    valid = np.isfinite(features).all(axis=1)
+    start = int(np.argmax(valid)) if valid.any() else len(valid)
+    return np.asarray(data)[start:], features[start:]
@@ -9,17 +9,25 @@ from sklearn.preprocessing import MinMaxScaler
 import pickle
 import os
 
+from indicators import drop_warmup
+
 class LinearRegressionModel:
-    def __init__(self, sequence_length=10):
+    def __init__(self, sequence_length=10, feature_columns=None):
         """
         Initialize Linear Regression model
         
         Args:
             sequence_length (int): Number of previous time steps to use
+            feature_columns (list): Indicator columns used as extra inputs,
+                see indicators.INDICATOR_COLUMNS
         """
         self.sequence_length = sequence_length
+        self.feature_columns = list(feature_columns or [])
         self.model = LinearRegression()
         self.scaler = MinMaxScaler(feature_range=(0, 1))
+        self.feature_scaler = MinMaxScaler(feature_range=(0, 1))
+        # In-sample residuals in price units, resampled for prediction intervals
+        self.residuals = None
         
     def _prepare_data(self, data):
         """
@@ -37,12 +45,13 @@ class LinearRegressionModel:
         
         return data_scaled, data_reshaped.shape
     
-    def _create_sequences(self, data):
+    def _create_sequences(self, data, features=None):
         """
         Create sequences for Linear Regression model
         
         Args:
             data (np.array): Input data
+            features (np.array): Scaled feature rows aligned with data
         
         Returns:
             tuple: X and y arrays
@@ -50,38 +59,62 @@ class LinearRegressionModel:
         X, y = [], []
         
         for i in range(len(data) - self.sequence_length):
-            X.append(data[i:i+self.sequence_length].flatten())
+            row = data[i:i+self.sequence_length].flatten()
+            if features is not None:
+                # Indicator values as of the last step of the sequence
+                row = np.concatenate([row, features[i+self.sequence_length-1]])
+            X.append(row)
             y.append(data[i+self.sequence_length])
         
         return np.array(X), np.array(y)
     
-    def train(self, data):
+    def train(self, data, features=None):
         """
         Train Linear Regression model
         
         Args:
             data (np.array): Input data
+            features (np.array): Feature rows aligned with data, one column
+                per name in feature_columns
         """
         try:
             # Prepare data
+            if self.feature_columns:
+                data, features = drop_warmup(data, features)
+                features = self.feature_scaler.fit_transform(features)
             data_scaled, _ = self._prepare_data(data)
-            X, y = self._create_sequences(data_scaled)
+            X, y = self._create_sequences(data_scaled, features if self.feature_columns else None)
             
             # Train model
             self.model.fit(X, y)
+            # Stored in price units, since predict refits the scaler on its input window
+            self.residuals = (y - self.model.predict(X)).ravel() / self.scaler.scale_[0]
             
             return True
         except Exception as e:
             print(f"Error training Linear Regression model: {e}")
             return False
     
-    def predict(self, data, steps=1):
+    @property
+    def nbytes(self):
+        """
+        Approximate resident size of the fitted coefficients in bytes
+        """
+        coef = getattr(self.model, 'coef_', None)
+        if coef is None:
+            return 0
+        residuals = self.residuals.nbytes if self.residuals is not None else 0
+        return np.asarray(coef).nbytes + np.asarray(self.model.intercept_).nbytes + residuals
+    
+    def predict(self, data, steps=1, features=None):
         """
         Make predictions using trained model
         
         Args:
             data (np.array): Input data for prediction
             steps (int): Number of steps to predict
+            features (np.array): Feature rows aligned with data; only the last
+                row is used and it is held constant for later steps
         
         Returns:
             np.array: Predicted values (unscaled)
@@ -89,16 +122,22 @@ class LinearRegressionModel:
         # Prepare data
         data_scaled, original_shape = self._prepare_data(data)
         
+        feature_row = np.empty((1, 0))
+        if self.feature_columns:
+            if features is None:
+                raise ValueError(f"Model expects features {self.feature_columns}")
+            feature_row = self.feature_scaler.transform(np.asarray(features)[-1:])
+        
         # Make predictions
         predictions = []
         current_sequence = data_scaled[-self.sequence_length:].flatten().reshape(1, -1)
         
         for _ in range(steps):
-            current_pred = self.model.predict(current_sequence)[0]
+            current_pred = self.model.predict(np.hstack([current_sequence, feature_row]))[0]
             predictions.append(current_pred)
             
             # Update sequence for next prediction
-            current_sequence = np.append(current_sequence[:, 1:], [[current_pred]], axis=1)
+            current_sequence = np.append(current_sequence[:, 1:], np.reshape(current_pred, (1, 1)), axis=1)
         
         # Convert predictions back to original scale
         predictions = np.array(predictions).reshape(-1, 1)
@@ -106,22 +145,64 @@ class LinearRegressionModel:
         
         return predictions.flatten()
     
-    def evaluate(self, test_data):
+    def predict_interval(self, data, steps=1, alpha=0.05, samples=1000, features=None, seed=None):
+        """
+        Estimate prediction intervals by bootstrapping training residuals
+        
+        All sample paths advance together as one matrix, so each step costs
+        a single vectorized predict call.
+        
+        Args:
+            data (np.array): Input data for prediction
+            steps (int): Number of steps to predict
+            alpha (float): Significance level, e.g. 0.05 for 95% intervals
+            samples (int): Number of bootstrap paths
+            features (np.array): Feature rows aligned with data
+            seed (int): Random seed for reproducible intervals
+        
+        Returns:
+            tuple: Lower and upper bounds (np.array, unscaled)
+        """
+        if self.residuals is None:
+            raise ValueError("Model has no stored residuals; retrain it to enable intervals")
+        
+        data_scaled, _ = self._prepare_data(data)
+        feature_row = np.empty((1, 0))
+        if self.feature_columns:
+            if features is None:
+                raise ValueError(f"Model expects features {self.feature_columns}")
+            feature_row = self.feature_scaler.transform(np.asarray(features)[-1:])
+        
+        rng = np.random.default_rng(seed)
+        # Residuals are in price units; move them into the scaling of this window
+        noise = rng.choice(self.residuals, size=(samples, steps)) * self.scaler.scale_[0]
+        sequences = np.repeat(data_scaled[-self.sequence_length:].reshape(1, -1), samples, axis=0)
+        feature_rows = np.repeat(feature_row, samples, axis=0)
+        
+        paths = np.empty((samples, steps))
+        for step in range(steps):
+            preds = self.model.predict(np.hstack([sequences, feature_rows])).reshape(-1) + noise[:, step]
+            paths[:, step] = preds
+            sequences = np.hstack([sequences[:, 1:], preds[:, None]])
+        
+        paths = self.scaler.inverse_transform(paths.reshape(-1, 1)).reshape(samples, steps)
+        lower, upper = np.quantile(paths, [alpha / 2, 1 - alpha / 2], axis=0)
+        return lower, upper
+    
+    def evaluate(self, test_data, train_data, features=None):
         """
         Evaluate model on test data
         
         Args:
             test_data (np.array): Actual values to compare against
+            train_data (np.array): Values preceding the test period
+            features (np.array): Feature rows aligned with train_data
         
         Returns:
             dict: Dictionary with evaluation metrics
         """
-        # Get the last sequence_length values from the training data
-        train_data = test_data[:-len(test_data)]
-        last_sequence = train_data[-self.sequence_length:]
-        
-        # Predict values for test period
-        predictions = self.predict(last_sequence, steps=len(test_data))
+        # Predict values for test period from the end of the training data
+        predictions = self.predict(train_data, steps=len(test_data), features=features)
         
         # Calculate MAPE
         mape = np.mean(np.abs((test_data - predictions) / test_data)) * 100
@@ -141,7 +222,7 @@ class LinearRegressionModel:
         """
         os.makedirs(os.path.dirname(filepath), exist_ok=True)
         with open(filepath, 'wb') as f:
-            pickle.dump((self.model, self.scaler), f)
+            pickle.dump((self.model, self.scaler, self.feature_scaler, self.feature_columns, self.residuals), f)
     
     def load(self, filepath='models/linear_model.pkl'):
         """
@@ -151,4 +232,13 @@ class LinearRegressionModel:
             filepath (str): Path to load model from
         """
         with open(filepath, 'rb') as f:
-            self.model, self.scaler = pickle.load(f)
+            saved = pickle.load(f)
+        
+        # Models saved before feature support only hold (model, scaler)
+        self.model, self.scaler = saved[:2]
+        if len(saved) > 2:
+            self.feature_scaler, self.feature_columns = saved[2:4]
+        else:
+            # Such models were trained on prices only, whatever features this instance was built with
+            self.feature_columns = []
+        self.residuals = saved[4] if len(saved) > 4 else None
@@ -4,22 +4,37 @@ LSTM model for stock price prediction
 """
 import numpy as np
 import pandas as pd
-from tensorflow.keras.models import Sequential, load_model
+from tensorflow.keras.models import Sequential, load_model, clone_model
 from tensorflow.keras.layers import LSTM, Dense, Dropout
 from sklearn.preprocessing import MinMaxScaler
 import os
 
+from indicators import drop_warmup
+
+# Resident bytes per model not covered by its weights: Keras layer and
+# variable objects and the traced predict function. 2 MB is a rough allowance
+# for the six-layer architecture below; to size it for a deployment, set it to
+# the RSS growth per additional resident model measured there.
+MODEL_OVERHEAD_BYTES = int(os.environ.get('LSTM_MODEL_OVERHEAD_BYTES', 2 * 1024 * 1024))
+
 class LSTMModel:
-    def __init__(self, sequence_length=10):
+    def __init__(self, sequence_length=10, lean=False, feature_columns=None):
         """
         Initialize LSTM model
         
         Args:
             sequence_length (int): Number of previous time steps to use
+            lean (bool): Keep an uncompiled inference copy after training,
+                dropping optimizer state and cached training functions
+            feature_columns (list): Indicator columns used as extra inputs,
+                see indicators.INDICATOR_COLUMNS
         """
         self.sequence_length = sequence_length
+        self.lean = lean
+        self.feature_columns = list(feature_columns or [])
         self.model = None
         self.scaler = MinMaxScaler(feature_range=(0, 1))
+        self.feature_scaler = MinMaxScaler(feature_range=(0, 1))
         
     def _build_model(self, input_shape):
         """
@@ -74,7 +89,7 @@ class LSTMModel:
         
         return np.array(X), np.array(y)
     
-    def train(self, data, epochs=50, batch_size=32, validation_split=0.2):
+    def train(self, data, epochs=50, batch_size=32, validation_split=0.2, features=None):
         """
         Train LSTM model
         
@@ -83,14 +98,23 @@ class LSTMModel:
             epochs (int): Number of training epochs
             batch_size (int): Batch size for training
             validation_split (float): Fraction of data to use for validation
+            features (np.array): Feature rows aligned with data, one column
+                per name in feature_columns
         """
         try:
             # Prepare data
+            if self.feature_columns:
+                data, features = drop_warmup(data, features)
+                features = self.feature_scaler.fit_transform(features)
             data_scaled, _ = self._prepare_data(data)
+            if self.feature_columns:
+                # Each time step carries the close followed by its indicator values
+                data_scaled = np.hstack([data_scaled, features])
             X, y = self._create_sequences(data_scaled)
+            y = y[:, :1]
             
             # Reshape X for LSTM [samples, time steps, features]
-            X = X.reshape(X.shape[0], X.shape[1], 1)
+            X = X.reshape(X.shape[0], X.shape[1], data_scaled.shape[1])
             
             # Build model
             self.model = self._build_model((X.shape[1], X.shape[2]))
@@ -104,18 +128,70 @@ class LSTMModel:
                 verbose=1
             )
             
+            if self.lean:
+                self._compact()
+            
             return True
         except Exception as e:
             print(f"Error training LSTM model: {e}")
             return False
     
-    def predict(self, data, steps=1):
+    def _compact(self):
+        """
+        Replace the trained model with an uncompiled copy of its weights
+        """
+        inference_model = clone_model(self.model)
+        inference_model.set_weights(self.model.get_weights())
+        self.model = inference_model
+    
+    @property
+    def nbytes(self):
+        """
+        Approximate resident size of the model in bytes, including Keras overhead
+        """
+        if self.model is None:
+            return 0
+        weights = self.model.count_params() * 4
+        # Adam keeps two slot variables per weight while the model is compiled
+        if getattr(self.model, 'optimizer', None) is not None:
+            weights *= 3
+        return weights + MODEL_OVERHEAD_BYTES
+    
+    def _prepare_inputs(self, data, features=None):
+        """
+        Build the scaled input window for prediction
+        
+        Args:
+            data (np.array): Input data for prediction
+            features (np.array): Feature rows aligned with data
+        
+        Returns:
+            tuple: Input window (1, sequence_length, inputs) and scaled last
+                feature row (1, n_features)
+        """
+        data_scaled, _ = self._prepare_data(data)
+        
+        feature_row = np.empty((1, 0))
+        if self.feature_columns:
+            if features is None:
+                raise ValueError(f"Model expects features {self.feature_columns}")
+            features = self.feature_scaler.transform(np.asarray(features)[-self.sequence_length:])
+            data_scaled = np.hstack([data_scaled[-self.sequence_length:], features])
+            feature_row = features[-1:]
+        
+        n_inputs = data_scaled.shape[1]
+        window = data_scaled[-self.sequence_length:].reshape(1, self.sequence_length, n_inputs)
+        return window, feature_row
+    
+    def predict(self, data, steps=1, features=None):
         """
         Make predictions using trained model
         
         Args:
             data (np.array): Input data for prediction
             steps (int): Number of steps to predict
+            features (np.array): Feature rows aligned with data; the last row
+                is held constant for later steps
         
         Returns:
             np.array: Predicted values (unscaled)
@@ -124,18 +200,19 @@ class LSTMModel:
             raise ValueError("Model has not been trained yet")
         
         # Prepare data
-        data_scaled, original_shape = self._prepare_data(data)
+        current_batch, feature_row = self._prepare_inputs(data, features)
+        n_inputs = current_batch.shape[2]
         
         # Make predictions
         predictions = []
-        current_batch = data_scaled[-self.sequence_length:].reshape(1, self.sequence_length, 1)
         
         for _ in range(steps):
             current_pred = self.model.predict(current_batch)[0]
             predictions.append(current_pred)
             
             # Update batch for next prediction
-            current_batch = np.append(current_batch[:, 1:, :], [[current_pred]], axis=1)
+            next_step = np.hstack([np.reshape(current_pred, (1, 1)), feature_row]).reshape(1, 1, n_inputs)
+            current_batch = np.append(current_batch[:, 1:, :], next_step, axis=1)
         
         # Convert predictions back to original scale
         predictions = np.array(predictions).reshape(-1, 1)
@@ -143,22 +220,56 @@ class LSTMModel:
         
         return predictions.flatten()
     
-    def evaluate(self, test_data):
+    def predict_interval(self, data, steps=1, alpha=0.05, samples=100, features=None):
+        """
+        Estimate prediction intervals with Monte-Carlo dropout
+        
+        All samples run as a single batch with the dropout layers active, so
+        each step costs one forward pass regardless of the number of samples.
+        
+        Args:
+            data (np.array): Input data for prediction
+            steps (int): Number of steps to predict
+            alpha (float): Significance level, e.g. 0.05 for 95% intervals
+            samples (int): Number of Monte-Carlo samples
+            features (np.array): Feature rows aligned with data
+        
+        Returns:
+            tuple: Lower and upper bounds (np.array, unscaled)
+        """
+        if self.model is None:
+            raise ValueError("Model has not been trained yet")
+        
+        window, feature_row = self._prepare_inputs(data, features)
+        n_inputs = window.shape[2]
+        batch = np.repeat(window, samples, axis=0)
+        feature_rows = np.repeat(feature_row, samples, axis=0)
+        
+        paths = np.empty((samples, steps))
+        for step in range(steps):
+            preds = np.asarray(self.model(batch, training=True)).reshape(samples, 1)
+            paths[:, step] = preds[:, 0]
+            next_step = np.hstack([preds, feature_rows]).reshape(samples, 1, n_inputs)
+            batch = np.concatenate([batch[:, 1:, :], next_step], axis=1)
+        
+        paths = self.scaler.inverse_transform(paths.reshape(-1, 1)).reshape(samples, steps)
+        lower, upper = np.quantile(paths, [alpha / 2, 1 - alpha / 2], axis=0)
+        return lower, upper
+    
+    def evaluate(self, test_data, train_data, features=None):
         """
         Evaluate model on test data
         
         Args:
             test_data (np.array): Actual values to compare against
+            train_data (np.array): Values preceding the test period
+            features (np.array): Feature rows aligned with train_data
         
         Returns:
             dict: Dictionary with evaluation metrics
         """
-        # Get the last sequence_length values from the training data
-        train_data = test_data[:-len(test_data)]
-        last_sequence = train_data[-self.sequence_length:]
-        
-        # Predict values for test period
-        predictions = self.predict(last_sequence, steps=len(test_data))
+        # Predict values for test period from the end of the training data
+        predictions = self.predict(train_data, steps=len(test_data), features=features)
         
         # Calculate MAPE
         mape = np.mean(np.abs((test_data - predictions) / test_data)) * 100
@@ -183,7 +294,7 @@ class LSTMModel:
         scaler_path = f"{filepath}_scaler.pkl"
         import pickle
         with open(scaler_path, 'wb') as f:
-            pickle.dump(self.scaler, f)
+            pickle.dump((self.scaler, self.feature_scaler, self.feature_columns), f)
     
     def load(self, filepath='models/lstm_model'):
         """
@@ -192,10 +303,18 @@ class LSTMModel:
         Args:
             filepath (str): Path to load model from
         """
-        self.model = load_model(filepath)
+        self.model = load_model(filepath, compile=not self.lean)
         
         # Load scaler
         scaler_path = f"{filepath}_scaler.pkl"
         import pickle
         with open(scaler_path, 'rb') as f:
-            self.scaler = pickle.load(f)
+            saved = pickle.load(f)
+        
+        # Models saved before feature support only hold the price scaler
+        if isinstance(saved, tuple):
+            self.scaler, self.feature_scaler, self.feature_columns = saved
+        else:
+            # Such models were trained on prices only, whatever features this instance was built with
+            self.scaler = saved
+            self.feature_columns = []
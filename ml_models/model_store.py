@@ -0,0 +1,173 @@
+"""
+Resident store for trained models and price data with a per-process memory budget
+"""
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+
+class ModelHolder:
+    """
+    Compact holder for the models trained for a single symbol
+    """
+    __slots__ = ('symbol', 'arima', 'lstm', 'linear', 'mape')
+
+    def __init__(self, symbol, arima, lstm, linear):
+        """
+        Initialize model holder
+
+        Args:
+            symbol (str): Stock symbol
+            arima (ARIMAModel): Trained ARIMA model
+            lstm (LSTMModel): Trained LSTM model
+            linear (LinearRegressionModel): Trained Linear Regression model
+        """
+        self.symbol = symbol
+        self.arima = arima
+        self.lstm = lstm
+        self.linear = linear
+        # MAPE per model type, computed once per training run
+        self.mape = None
+
+    @property
+    def nbytes(self):
+        """
+        Approximate resident size of all held models in bytes
+        """
+        return self.arima.nbytes + self.lstm.nbytes + self.linear.nbytes
+
+
+class _Entry:
+    __slots__ = ('value', 'nbytes', 'expires_at')
+
+    def __init__(self, value, nbytes, expires_at):
+        self.value = value
+        self.nbytes = nbytes
+        self.expires_at = expires_at
+
+
+class ResidentStore:
+    """
+    Thread-safe LRU store that evicts entries to stay within a byte budget
+    """
+
+    def __init__(self, budget_bytes):
+        """
+        Initialize resident store
+
+        Args:
+            budget_bytes (int): Maximum total size of resident entries
+        """
+        self.budget_bytes = budget_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """
+        Get a resident value, marking it as recently used
+
+        Args:
+            key (tuple): Entry key, e.g. ('model', 'AAPL')
+
+        Returns:
+            object: Stored value, or None if missing or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry.expires_at is not None and entry.expires_at < time.time():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.value
+
+    def put(self, key, value, nbytes, ttl=None):
+        """
+        Store a value and evict least recently used entries over budget
+
+        Args:
+            key (tuple): Entry key
+            value (object): Value to keep resident
+            nbytes (int): Approximate size of the value in bytes
+            ttl (float): Seconds until the entry expires, or None to keep it
+        """
+        expires_at = time.time() + ttl if ttl is not None else None
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _Entry(value, nbytes, expires_at)
+            self._used += nbytes
+            self._evict()
+
+    def pop(self, key):
+        """
+        Remove an entry if present
+
+        Args:
+            key (tuple): Entry key
+        """
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._used -= entry.nbytes
+
+    def _evict(self):
+        # Always keep the newest entry, even if it alone exceeds the budget
+        while self._used > self.budget_bytes and len(self._entries) > 1:
+            key, entry = self._entries.popitem(last=False)
+            self._used -= entry.nbytes
+            self.evictions += 1
+            print(f"Evicted {key} ({entry.nbytes} bytes) from resident store")
+
+    def usage(self):
+        """
+        Report current memory usage of the store
+
+        Returns:
+            dict: Budget, usage and per-kind breakdown
+        """
+        with self._lock:
+            by_kind = {}
+            for key, entry in self._entries.items():
+                kind = by_kind.setdefault(key[0], {'entries': 0, 'bytes': 0})
+                kind['entries'] += 1
+                kind['bytes'] += entry.nbytes
+            return {
+                'budgetBytes': self.budget_bytes,
+                'usedBytes': self._used,
+                'entries': len(self._entries),
+                'byKind': by_kind,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
+
+def process_rss_bytes():
+    """
+    Get the resident set size of the current process
+
+    Returns:
+        int: RSS in bytes, or peak RSS where /proc is unavailable
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import resource
+        # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
@@ -0,0 +1,135 @@
+"""
+Precompute models and forecasts for a watchlist
+
+Fetches price history for all symbols in one bulk request, then trains every
+model type per symbol across a process pool and writes the model artifacts
+and forecasts that the API preloads at startup.
+
+Usage:
+    python precompute.py AAPL MSFT GOOG
+    python precompute.py --watchlist watchlist.txt --workers 4
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from data_loader import get_multiple_stock_bars
+from fetcher import UpstreamUnavailable
+from training import evaluate_models, load_or_train_models, read_watchlist, write_forecast
+
+
+def precompute_symbol(symbol, bars, model_dir, lean=False, feature_columns=None):
+    """
+    Train, evaluate and forecast all model types for one symbol
+
+    Args:
+        symbol (str): Stock symbol
+        bars (PriceBars): Training history
+        model_dir (str): Directory for artifacts and forecasts
+        lean (bool): Save memory-lean model state
+        feature_columns (list): Indicator columns for the LSTM and Linear Regression models
+
+    Returns:
+        dict: Seconds spent per stage
+    """
+    start = time.perf_counter()
+    holder, timings = load_or_train_models(
+        symbol, bars, model_dir, lean=lean, feature_columns=feature_columns, retrain=True
+    )
+
+    stage = time.perf_counter()
+    holder.mape = evaluate_models(bars, lean=lean, feature_columns=feature_columns)
+    timings['evaluate'] = time.perf_counter() - stage
+
+    stage = time.perf_counter()
+    write_forecast(symbol, holder, bars, model_dir)
+    timings['forecast'] = time.perf_counter() - stage
+
+    timings['total'] = time.perf_counter() - start
+    return timings
+
+
+def print_report(fetch_seconds, results, errors):
+    """
+    Print per-symbol timings
+
+    Args:
+        fetch_seconds (float): Seconds spent on the bulk fetch
+        results (dict): Timings per symbol
+        errors (dict): Error message per failed symbol
+    """
+    columns = ('ARIMA', 'LSTM', 'LINEAR', 'evaluate', 'forecast', 'total')
+    print(f"\nFetched data in {fetch_seconds:.2f}s")
+    print(f"{'symbol':<10}" + ''.join(f"{column:>10}" for column in columns))
+    for symbol, timings in sorted(results.items()):
+        print(f"{symbol:<10}" + ''.join(f"{timings.get(column, 0.0):>10.2f}" for column in columns))
+    for symbol, error in sorted(errors.items()):
+        print(f"{symbol:<10}  failed: {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Precompute models and forecasts for a watchlist')
+    parser.add_argument('symbols', nargs='*', help='Stock symbols')
+    parser.add_argument('--watchlist', default=None, help='File with one symbol per line')
+    parser.add_argument('--period', default='1y', help='History to train on (default: 1y)')
+    parser.add_argument('--model-dir', default='models', help='Output directory (default: models)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Number of training processes')
+    parser.add_argument('--lean', action='store_true', help='Save memory-lean model state')
+    parser.add_argument('--features', default='', help='Comma-separated indicator columns used as model features')
+    args = parser.parse_args()
+
+    symbols = [symbol.upper() for symbol in args.symbols]
+    if args.watchlist:
+        symbols += read_watchlist(args.watchlist)
+    symbols = list(dict.fromkeys(symbols))
+    if not symbols:
+        parser.error('no symbols given')
+    feature_columns = [column for column in args.features.split(',') if column]
+
+    start = time.perf_counter()
+    try:
+        all_bars = get_multiple_stock_bars(symbols, period=args.period, dtype=np.float64)
+    except UpstreamUnavailable as e:
+        print(f"Error fetching data: {e}")
+        return 1
+    fetch_seconds = time.perf_counter() - start
+
+    results, errors = {}, {}
+    # TensorFlow is not fork-safe, so workers are spawned
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=context) as executor:
+        futures = {}
+        for symbol in symbols:
+            bars = all_bars[symbol]
+            if bars.empty:
+                errors[symbol] = 'no data'
+                continue
+            future = executor.submit(
+                precompute_symbol, symbol, bars, args.model_dir, args.lean, feature_columns
+            )
+            futures[future] = symbol
+
+        for future in as_completed(futures):
+            symbol = futures[future]
+            try:
+                results[symbol] = future.result()
+                print(f"Precomputed {symbol} in {results[symbol]['total']:.2f}s")
+            except Exception as e:
+                errors[symbol] = str(e)
+
+    print_report(fetch_seconds, results, errors)
+
+    os.makedirs(args.model_dir, exist_ok=True)
+    with open(os.path.join(args.model_dir, 'precompute_report.json'), 'w') as f:
+        json.dump({'fetchSeconds': fetch_seconds, 'timings': results, 'errors': errors}, f, indent=2)
+
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
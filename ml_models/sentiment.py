@@ -0,0 +1,367 @@
+"""
+Lexicon-based sentiment engine for stock headlines
+
+Headlines are read from per-symbol text files, scored in vectorized batches
+and folded into running aggregates, so requests only read precomputed counts.
+
+Expected layout::
+
+    sentiment_data/
+        AAPL/
+            2024-05.txt    # one document per line: "YYYY-MM-DD<TAB>headline"
+        lexicon.txt        # optional overrides: "word<TAB>score"
+"""
+import os
+import re
+import threading
+from datetime import datetime
+
+import numpy as np
+
+# Small finance-oriented lexicon, scores in [-1, 1]
+DEFAULT_LEXICON = {
+    'beat': 1.0, 'beats': 1.0, 'surge': 1.0, 'surges': 1.0, 'soar': 1.0, 'soars': 1.0,
+    'rally': 0.8, 'rallies': 0.8, 'gain': 0.6, 'gains': 0.6, 'rise': 0.5, 'rises': 0.5,
+    'jump': 0.7, 'jumps': 0.7, 'record': 0.5, 'strong': 0.6, 'growth': 0.6, 'profit': 0.6,
+    'profits': 0.6, 'upgrade': 0.9, 'upgrades': 0.9, 'upgraded': 0.9, 'outperform': 0.8,
+    'bullish': 0.9, 'buy': 0.5, 'boost': 0.6, 'boosts': 0.6, 'positive': 0.6, 'optimistic': 0.7,
+    'expands': 0.4, 'expansion': 0.4, 'innovative': 0.5, 'approval': 0.6, 'approved': 0.6,
+    'dividend': 0.3, 'recovery': 0.5, 'rebound': 0.6, 'tops': 0.6, 'exceeds': 0.8,
+    'miss': -1.0, 'misses': -1.0, 'plunge': -1.0, 'plunges': -1.0, 'slump': -0.9, 'slumps': -0.9,
+    'fall': -0.5, 'falls': -0.5, 'drop': -0.6, 'drops': -0.6, 'decline': -0.6, 'declines': -0.6,
+    'loss': -0.7, 'losses': -0.7, 'weak': -0.6, 'downgrade': -0.9, 'downgrades': -0.9,
+    'downgraded': -0.9, 'underperform': -0.8, 'bearish': -0.9, 'sell': -0.5, 'cut': -0.5,
+    'cuts': -0.5, 'lawsuit': -0.7, 'probe': -0.6, 'investigation': -0.6, 'recall': -0.7,
+    'layoffs': -0.7, 'fraud': -1.0, 'warning': -0.6, 'warns': -0.6, 'negative': -0.6,
+    'pessimistic': -0.7, 'crash': -1.0, 'bankruptcy': -1.0, 'delay': -0.4, 'delays': -0.4,
+    'fine': -0.4, 'fined': -0.6, 'volatile': -0.3, 'risk': -0.3, 'concerns': -0.4,
+}
+
+# Tokens that flip the polarity of the following token
+NEGATORS = ('not', 'no', 'never', "isn't", "doesn't", "didn't", "won't", 'without')
+
+TOKEN_PATTERN = re.compile(r"[a-z][a-z']*")
+
+LABELS = ('positive', 'negative', 'neutral')
+
+
+def load_lexicon(path):
+    """
+    Load a lexicon file, one "word<TAB>score" entry per line
+
+    Args:
+        path (str): Path to lexicon file
+
+    Returns:
+        dict: Mapping from word to score
+    """
+    lexicon = {}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            parts = line.strip().split('\t')
+            if len(parts) == 2:
+                lexicon[parts[0].lower()] = float(parts[1])
+    return lexicon
+
+
+class SentimentEngine:
+    def __init__(self, data_dir='sentiment_data', lexicon=None, threshold=0.25):
+        """
+        Initialize sentiment engine
+
+        Args:
+            data_dir (str): Directory with one sub-directory of text files per symbol
+            lexicon (dict): Word scores, defaults to DEFAULT_LEXICON plus
+                data_dir/lexicon.txt if present
+            threshold (float): Minimum absolute normalized score to label a
+                document positive or negative
+        """
+        self.data_dir = data_dir
+        self.threshold = threshold
+
+        if lexicon is None:
+            lexicon = dict(DEFAULT_LEXICON)
+            lexicon_path = os.path.join(data_dir, 'lexicon.txt')
+            if os.path.exists(lexicon_path):
+                lexicon.update(load_lexicon(lexicon_path))
+
+        # Vocabulary ids index into the score array; id 0 is the unknown token
+        self._vocab = {word: i + 1 for i, word in enumerate(lexicon)}
+        self._scores = np.zeros(len(self._vocab) + 1, dtype=np.float32)
+        self._scores[1:] = np.fromiter(lexicon.values(), dtype=np.float32, count=len(lexicon))
+        self._negators = frozenset(NEGATORS)
+
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        # Threads do not survive fork, so the refresh thread is tracked per process
+        self._start_lock = threading.Lock()
+        self._refresh_thread = None
+        self._refresh_pid = None
+        # Bytes already consumed from each file, for incremental reads
+        self._offsets = {}
+        # Inode and document ids per file, to retract a file that is rewritten or deleted
+        self._inodes = {}
+        self._file_docs = {}
+        # Inverted index: symbol -> date -> list of document ids
+        self._index = {}
+        # Document id -> (score, label, date); retracted documents are removed
+        self._docs = {}
+        self._next_id = 0
+        # Running aggregates: symbol -> [positive, negative, neutral] counts
+        self._totals = {}
+        self._daily = {}
+        self.updated_at = None
+
+    def score(self, texts):
+        """
+        Score a batch of documents
+
+        Args:
+            texts (list): Document strings
+
+        Returns:
+            tuple: Normalized scores (np.array) and label indices into LABELS (np.array)
+        """
+        n_docs = len(texts)
+        token_ids, doc_ids, negated = [], [], []
+        for doc_id, text in enumerate(texts):
+            tokens = TOKEN_PATTERN.findall(text.lower())
+            token_ids.extend(self._vocab.get(token, 0) for token in tokens)
+            doc_ids.extend([doc_id] * len(tokens))
+            # The negation flag for token i is set by token i-1
+            if tokens:
+                negated.append(False)
+                negated.extend(token in self._negators for token in tokens[:-1])
+
+        token_ids = np.asarray(token_ids, dtype=np.int64)
+        doc_ids = np.asarray(doc_ids, dtype=np.int64)
+        sign = np.where(np.asarray(negated, dtype=bool), -1.0, 1.0)
+
+        token_scores = self._scores[token_ids] * sign
+        hits = (token_ids > 0).astype(np.float64)
+        totals = np.bincount(doc_ids, weights=token_scores, minlength=n_docs)
+        counts = np.bincount(doc_ids, weights=hits, minlength=n_docs)
+
+        # Normalize by the square root of matched terms so long texts do not dominate
+        scores = totals / np.sqrt(np.maximum(counts, 1.0))
+        labels = np.full(n_docs, 2, dtype=np.int64)
+        labels[scores >= self.threshold] = 0
+        labels[scores <= -self.threshold] = 1
+        return scores, labels
+
+    def ingest(self, symbol, texts, dates):
+        """
+        Score new documents and fold them into the aggregates
+
+        Args:
+            symbol (str): Stock symbol
+            texts (list): Document strings
+            dates (list): Document dates as 'YYYY-MM-DD' strings
+
+        Returns:
+            range: Ids assigned to the documents
+        """
+        if not texts:
+            return range(0)
+        scores, labels = self.score(texts)
+
+        with self._lock:
+            first_id = self._next_id
+            self._next_id += len(texts)
+            self._docs.update(zip(range(first_id, self._next_id), zip(scores.tolist(), labels.tolist(), dates)))
+
+            index = self._index.setdefault(symbol, {})
+            daily = self._daily.setdefault(symbol, {})
+            for offset, date in enumerate(dates):
+                index.setdefault(date, []).append(first_id + offset)
+
+            totals = self._totals.setdefault(symbol, np.zeros(3, dtype=np.int64))
+            totals += np.bincount(labels, minlength=3)
+
+            unique_dates, inverse = np.unique(np.asarray(dates), return_inverse=True)
+            per_date = np.zeros((len(unique_dates), 3), dtype=np.int64)
+            np.add.at(per_date, (inverse, labels), 1)
+            for date, counts in zip(unique_dates.tolist(), per_date):
+                daily.setdefault(date, np.zeros(3, dtype=np.int64))[:] += counts
+
+            self.updated_at = datetime.now()
+        return range(first_id, first_id + len(texts))
+
+    def retract(self, symbol, doc_ids):
+        """
+        Remove documents from the aggregates, the index and the document store
+
+        Args:
+            symbol (str): Stock symbol the documents were ingested for
+            doc_ids (list): Ids returned by ingest
+        """
+        if not doc_ids:
+            return
+        with self._lock:
+            docs = [self._docs.pop(i) for i in doc_ids]
+            labels = np.asarray([label for _, label, _ in docs], dtype=np.int64)
+            dates = [date for _, _, date in docs]
+            self._totals[symbol] -= np.bincount(labels, minlength=3)
+
+            index = self._index[symbol]
+            daily = self._daily[symbol]
+            removed = set(doc_ids)
+            for date, label in zip(dates, labels):
+                daily[date][label] -= 1
+            for date in set(dates):
+                index[date] = [i for i in index[date] if i not in removed]
+                if not index[date]:
+                    del index[date]
+                    del daily[date]
+
+            self.updated_at = datetime.now()
+
+    def refresh(self):
+        """
+        Ingest documents appended to the data directory since the last refresh
+
+        Documents from files that were deleted since the last refresh are retracted.
+
+        Returns:
+            int: Number of new documents ingested
+        """
+        with self._refresh_lock:
+            self._retract_deleted()
+        if not os.path.isdir(self.data_dir):
+            return 0
+
+        ingested = 0
+        with self._refresh_lock:
+            for symbol in sorted(os.listdir(self.data_dir)):
+                symbol_dir = os.path.join(self.data_dir, symbol)
+                if not os.path.isdir(symbol_dir):
+                    continue
+
+                texts, dates, sources = [], [], []
+                for name in sorted(os.listdir(symbol_dir)):
+                    path = os.path.join(symbol_dir, name)
+                    if os.path.isfile(path):
+                        count = len(texts)
+                        self._read_new_lines(symbol.upper(), path, texts, dates)
+                        sources.append((path, len(texts) - count))
+
+                doc_ids = self.ingest(symbol.upper(), texts, dates)
+                start = 0
+                for path, count in sources:
+                    self._file_docs.setdefault(path, []).extend(doc_ids[start:start + count])
+                    start += count
+                ingested += len(texts)
+        return ingested
+
+    def _retract_deleted(self):
+        for path in [path for path in self._inodes if not os.path.isfile(path)]:
+            symbol = os.path.basename(os.path.dirname(path)).upper()
+            self.retract(symbol, self._file_docs.pop(path, []))
+            self._offsets.pop(path, None)
+            del self._inodes[path]
+
+    def _read_new_lines(self, symbol, path, texts, dates):
+        offset = self._offsets.get(path, 0)
+        stat = os.stat(path)
+        if stat.st_size < offset or self._inodes.get(path, stat.st_ino) != stat.st_ino:
+            # File was truncated or replaced; drop what it contributed and read it again
+            self.retract(symbol, self._file_docs.pop(path, []))
+            offset = self._offsets[path] = 0
+        self._inodes[path] = stat.st_ino
+        size = stat.st_size
+        if size == offset:
+            return
+
+        default_date = datetime.fromtimestamp(stat.st_mtime).strftime('%Y-%m-%d')
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            chunk = f.read()
+
+        # Only consume complete lines; a partial last line is read next time
+        end = chunk.rfind(b'\n') + 1
+        if end == 0:
+            return
+        self._offsets[path] = offset + end
+
+        for line in chunk[:end].decode('utf-8', errors='replace').splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            date, sep, text = line.partition('\t')
+            if not sep:
+                date, text = default_date, line
+            texts.append(text)
+            dates.append(date)
+
+    def summary(self, symbol, date=None):
+        """
+        Get the precomputed sentiment breakdown for a symbol
+
+        Args:
+            symbol (str): Stock symbol
+            date (str): Restrict to a single 'YYYY-MM-DD' date
+
+        Returns:
+            dict: Percentages per label and overall label, or None if no
+                documents are indexed
+        """
+        with self._lock:
+            if date is None:
+                counts = self._totals.get(symbol)
+            else:
+                counts = self._daily.get(symbol, {}).get(date)
+            if counts is None or counts.sum() == 0:
+                return None
+            counts = counts.copy()
+
+        total = int(counts.sum())
+        percentages = counts / total * 100
+        return {
+            'positive': float(percentages[0]),
+            'negative': float(percentages[1]),
+            'neutral': float(percentages[2]),
+            'overall': LABELS[int(np.argmax(counts))],
+            'documents': total
+        }
+
+    def documents(self, symbol, date):
+        """
+        Get indexed document scores for a symbol on a date
+
+        Args:
+            symbol (str): Stock symbol
+            date (str): 'YYYY-MM-DD' date
+
+        Returns:
+            list: (score, label) tuples
+        """
+        with self._lock:
+            doc_ids = list(self._index.get(symbol, {}).get(date, ()))
+            return [(self._docs[i][0], LABELS[self._docs[i][1]]) for i in doc_ids]
+
+    def start_background_refresh(self, interval=60):
+        """
+        Refresh from the data directory periodically in a daemon thread
+
+        Safe to call on every request: the thread is started once per
+        process, so forked workers each start their own.
+
+        Args:
+            interval (float): Seconds between refreshes
+        """
+        with self._start_lock:
+            if self._refresh_thread is not None and self._refresh_pid == os.getpid():
+                return self._refresh_thread
+
+            def run():
+                stop = threading.Event()
+                while not stop.wait(interval):
+                    try:
+                        self.refresh()
+                    except Exception as e:
+                        print(f"Error refreshing sentiment data: {e}")
+
+            self._refresh_pid = os.getpid()
+            self._refresh_thread = threading.Thread(target=run, name='sentiment-refresh', daemon=True)
+            self._refresh_thread.start()
+            return self._refresh_thread
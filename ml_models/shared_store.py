@@ -0,0 +1,382 @@
+"""
+Memory-mapped model and price store shared by pre-fork API workers
+
+A loader process publishes price arrays and model parameters as .npy files
+into a new version directory and then atomically points CURRENT at it.
+Workers map the files read-only, so every worker shares the same page-cache
+copy instead of holding its own, and pick up a new version on the next
+request after the pointer changes.
+
+Layout::
+
+    shared/
+        CURRENT                # name of the active version directory
+        v1718000000000-1234/
+            AAPL/
+                meta.pkl       # small metadata: model settings, scalers, MAPE
+                dates.npy ...  # price columns
+                arima_params.npy, arima_tail.npy
+                lstm_w0.npy ...
+                linear_coef.npy, linear_intercept.npy, linear_residuals.npy
+
+Usage:
+    python shared_store.py publish AAPL MSFT --root shared --every 300
+"""
+import argparse
+import os
+import pickle
+import shutil
+import threading
+import time
+
+import numpy as np
+
+from data_loader import PriceBars
+
+PRICE_COLUMNS = ('dates', 'open', 'high', 'low', 'close', 'volume')
+POINTER = 'CURRENT'
+
+
+def _export_models(holder):
+    """
+    Split a model holder into small metadata and large arrays
+
+    Args:
+        holder (ModelHolder): Trained models
+
+    Returns:
+        tuple: Metadata (dict) and arrays by file stem (dict)
+    """
+    arima, lstm, linear = holder.arima, holder.lstm, holder.linear
+    arrays = {}
+
+    # ARIMA is always shared in its lean form: parameters plus a short tail
+    if arima.model_fit is not None:
+        arrays['arima_params'] = np.asarray(arima.model_fit.params, dtype=np.float64)
+        arrays['arima_tail'] = np.asarray(arima.model_fit.model.endog, dtype=np.float64).ravel()[-arima.tail_length:]
+    else:
+        arrays['arima_params'] = arima.params
+        arrays['arima_tail'] = arima.tail
+
+    lstm_weights = lstm.model.get_weights()
+    for i, weights in enumerate(lstm_weights):
+        arrays[f'lstm_w{i}'] = np.asarray(weights)
+
+    arrays['linear_coef'] = np.asarray(linear.model.coef_)
+    arrays['linear_intercept'] = np.asarray(linear.model.intercept_)
+    if linear.residuals is not None:
+        arrays['linear_residuals'] = np.asarray(linear.residuals)
+
+    meta = {
+        'arima_order': arima.order,
+        'lstm_sequence_length': lstm.sequence_length,
+        'lstm_feature_columns': lstm.feature_columns,
+        'lstm_feature_scaler': lstm.feature_scaler,
+        'lstm_n_inputs': lstm.model.input_shape[-1],
+        'lstm_n_weights': len(lstm_weights),
+        'linear_sequence_length': linear.sequence_length,
+        'linear_feature_columns': linear.feature_columns,
+        'linear_feature_scaler': linear.feature_scaler,
+        'mape': holder.mape,
+    }
+    return meta, arrays
+
+
+def publish(root, entries, keep=2):
+    """
+    Publish a new version and atomically make it current
+
+    Symbols in the previous version that are not in entries are carried
+    forward with hard links, so one symbol can be updated on its own.
+
+    Args:
+        root (str): Shared store directory
+        entries (dict): (PriceBars, ModelHolder or None) per symbol
+        keep (int): Number of versions to keep; older ones are removed, which
+            is safe for workers still mapping them on POSIX systems
+
+    Returns:
+        str: Name of the published version
+    """
+    os.makedirs(root, exist_ok=True)
+    version = f'v{int(time.time() * 1000)}-{os.getpid()}'
+    staging = os.path.join(root, f'.{version}.tmp')
+    os.makedirs(staging)
+
+    for symbol, (bars, holder) in entries.items():
+        symbol_dir = os.path.join(staging, symbol)
+        os.makedirs(symbol_dir)
+        for name in PRICE_COLUMNS:
+            np.save(os.path.join(symbol_dir, f'{name}.npy'), getattr(bars, name))
+
+        meta = {'has_models': holder is not None}
+        if holder is not None:
+            model_meta, arrays = _export_models(holder)
+            meta.update(model_meta)
+            for name, array in arrays.items():
+                np.save(os.path.join(symbol_dir, f'{name}.npy'), array)
+        with open(os.path.join(symbol_dir, 'meta.pkl'), 'wb') as f:
+            pickle.dump(meta, f)
+
+    previous = current_version(root)
+    if previous is not None:
+        previous_dir = os.path.join(root, previous)
+        for symbol in os.listdir(previous_dir):
+            if symbol in entries:
+                continue
+            os.makedirs(os.path.join(staging, symbol))
+            for name in os.listdir(os.path.join(previous_dir, symbol)):
+                os.link(os.path.join(previous_dir, symbol, name), os.path.join(staging, symbol, name))
+
+    os.rename(staging, os.path.join(root, version))
+    pointer_tmp = os.path.join(root, f'.{POINTER}.{os.getpid()}.tmp')
+    with open(pointer_tmp, 'w') as f:
+        f.write(version)
+    os.replace(pointer_tmp, os.path.join(root, POINTER))
+
+    versions = sorted(name for name in os.listdir(root) if name.startswith('v'))
+    for old in versions[:-keep]:
+        shutil.rmtree(os.path.join(root, old), ignore_errors=True)
+    return version
+
+
+def current_version(root):
+    """
+    Read the active version name
+
+    Args:
+        root (str): Shared store directory
+
+    Returns:
+        str: Version directory name, or None if nothing was published
+    """
+    try:
+        with open(os.path.join(root, POINTER)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+class SharedStoreReader:
+    """
+    Read-only view of the current shared store version in a worker process
+    """
+
+    def __init__(self, root, check_interval=1.0):
+        """
+        Initialize shared store reader
+
+        Args:
+            root (str): Shared store directory
+            check_interval (float): Minimum seconds between checks of the
+                version pointer
+        """
+        self.root = root
+        self.check_interval = check_interval
+        self.version = None
+        self._checked_at = 0.0
+        self._bars = {}
+        self._models = {}
+        # LSTM weight count and input width per symbol, for building after fork
+        self._lstm_shapes = {}
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+        version = current_version(self.root)
+        if version != self.version:
+            with self._lock:
+                # Swap whole dicts so in-flight requests keep a consistent view
+                self.version = version
+                self._bars = {}
+                self._models = {}
+                self._lstm_shapes = {}
+            if version is not None:
+                print(f"Mapped shared store version {version}")
+
+    def _symbol_dir(self, symbol):
+        if self.version is None:
+            return None
+        path = os.path.join(self.root, self.version, symbol)
+        return path if os.path.isdir(path) else None
+
+    def _load(self, symbol_dir, name):
+        return np.load(os.path.join(symbol_dir, f'{name}.npy'), mmap_mode='r')
+
+    def symbols(self):
+        """
+        List symbols in the current version
+
+        Returns:
+            list: Stock symbols
+        """
+        self._refresh()
+        if self.version is None:
+            return []
+        return sorted(os.listdir(os.path.join(self.root, self.version)))
+
+    def bars(self, symbol):
+        """
+        Get memory-mapped price bars for a symbol
+
+        Args:
+            symbol (str): Stock symbol
+
+        Returns:
+            PriceBars: Read-only bars, or None if the symbol is not published
+        """
+        self._refresh()
+        bars = self._bars.get(symbol)
+        if bars is not None:
+            return bars
+
+        symbol_dir = self._symbol_dir(symbol)
+        if symbol_dir is None:
+            return None
+        columns = [self._load(symbol_dir, name) for name in PRICE_COLUMNS]
+        # Matching dtypes keep the arrays as views of the mapping
+        bars = PriceBars(symbol, *columns, dtype=columns[4].dtype)
+        self._bars[symbol] = bars
+        return bars
+
+    def models(self, symbol, build_lstm=True):
+        """
+        Get models for a symbol backed by the shared arrays
+
+        ARIMA and Linear Regression parameters stay memory-mapped. Keras
+        copies LSTM weights into its own variables, so the LSTM is built per
+        worker; pass build_lstm=False before forking.
+
+        Args:
+            symbol (str): Stock symbol
+            build_lstm (bool): Build the LSTM model as well
+
+        Returns:
+            ModelHolder: Models, or None if the symbol has no published models
+        """
+        self._refresh()
+        holder = self._models.get(symbol)
+        if holder is None:
+            holder = self._map_models(symbol)
+            if holder is None:
+                return None
+            self._models[symbol] = holder
+
+        if build_lstm and holder.lstm.model is None:
+            with self._lock:
+                # Concurrent first requests must not each build a model
+                if holder.lstm.model is None:
+                    symbol_dir = self._symbol_dir(symbol)
+                    lstm = holder.lstm
+                    n_weights, n_inputs = self._lstm_shapes[symbol]
+                    model = lstm._build_model((lstm.sequence_length, n_inputs))
+                    model.set_weights([self._load(symbol_dir, f'lstm_w{i}') for i in range(n_weights)])
+                    lstm.model = model
+        return holder
+
+    def _map_models(self, symbol):
+        symbol_dir = self._symbol_dir(symbol)
+        if symbol_dir is None:
+            return None
+        with open(os.path.join(symbol_dir, 'meta.pkl'), 'rb') as f:
+            meta = pickle.load(f)
+        if not meta['has_models']:
+            return None
+
+        from arima_model import ARIMAModel
+        from linear_regression_model import LinearRegressionModel
+        from lstm_model import LSTMModel
+        from model_store import ModelHolder
+
+        arima = ARIMAModel(order=meta['arima_order'], lean=True)
+        arima.params = self._load(symbol_dir, 'arima_params')
+        arima.tail = self._load(symbol_dir, 'arima_tail')
+
+        linear = LinearRegressionModel(meta['linear_sequence_length'], meta['linear_feature_columns'])
+        linear.feature_scaler = meta['linear_feature_scaler']
+        linear.model.coef_ = self._load(symbol_dir, 'linear_coef')
+        linear.model.intercept_ = self._load(symbol_dir, 'linear_intercept')
+        linear.model.n_features_in_ = linear.model.coef_.shape[-1]
+        if os.path.exists(os.path.join(symbol_dir, 'linear_residuals.npy')):
+            linear.residuals = self._load(symbol_dir, 'linear_residuals')
+
+        lstm = LSTMModel(meta['lstm_sequence_length'], lean=True, feature_columns=meta['lstm_feature_columns'])
+        lstm.feature_scaler = meta['lstm_feature_scaler']
+        self._lstm_shapes[symbol] = (meta['lstm_n_weights'], meta['lstm_n_inputs'])
+
+        holder = ModelHolder(symbol, arima, lstm, linear)
+        holder.mape = meta['mape']
+        return holder
+
+    def preload(self):
+        """
+        Map prices and ARIMA/Linear parameters for every published symbol
+
+        Safe to call before forking workers, since no TensorFlow state is created.
+        """
+        for symbol in self.symbols():
+            self.bars(symbol)
+            self.models(symbol, build_lstm=False)
+
+    def usage(self):
+        """
+        Report the mapped version and sizes
+
+        Returns:
+            dict: Version, mapped symbols and mapped bytes
+        """
+        with self._lock:
+            bars = dict(self._bars)
+        return {
+            'version': self.version,
+            'symbols': len(bars),
+            'mappedPriceBytes': sum(b.nbytes for b in bars.values())
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Publish prices and models to the shared store')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    publish_parser = subparsers.add_parser('publish', help='Publish a new version')
+    publish_parser.add_argument('symbols', nargs='+', help='Stock symbols')
+    publish_parser.add_argument('--root', default='shared', help='Shared store directory (default: shared)')
+    publish_parser.add_argument('--model-dir', default='models', help='Directory with saved models (default: models)')
+    publish_parser.add_argument('--period', default='1y', help='Price history to publish (default: 1y)')
+    publish_parser.add_argument('--every', type=float, default=None,
+                                help='Keep running and republish every N seconds')
+    args = parser.parse_args()
+
+    from data_loader import get_multiple_stock_bars
+    from fetcher import UpstreamUnavailable
+    from training import load_saved_models
+
+    symbols = [symbol.upper() for symbol in args.symbols]
+    while True:
+        try:
+            all_bars = get_multiple_stock_bars(symbols, period=args.period, dtype=np.float64)
+        except UpstreamUnavailable as e:
+            print(f"Error fetching data, keeping previous version: {e}")
+            if args.every is None:
+                return 1
+            time.sleep(args.every)
+            continue
+        entries = {}
+        for symbol in symbols:
+            bars = all_bars[symbol]
+            if bars.empty:
+                print(f"No data for {symbol}, keeping previous version")
+                continue
+            entries[symbol] = (bars, load_saved_models(symbol, args.model_dir))
+        version = publish(args.root, entries)
+        print(f"Published {len(entries)} symbols as {version}")
+
+        if args.every is None:
+            return 0
+        time.sleep(args.every)
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
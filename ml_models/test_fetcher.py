@@ -0,0 +1,162 @@
+"""
+Tests for the upstream fetcher against a local stub server
+
+Run with:
+    python -m unittest test_fetcher
+"""
+import json
+import threading
+import time
+import types
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+from fetcher import CircuitBreaker, Fetcher, HTTPBackend, UpstreamUnavailable, YahooBackend
+
+KNOWN_SYMBOLS = ('AAPL', 'MSFT')
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # Set by the test case: list of requested symbol strings, and status codes to return first
+    calls = None
+    statuses = None
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        symbols = parse_qs(urlparse(self.path).query)['symbols'][0]
+        self.calls.append(symbols)
+        status = self.statuses.pop(0) if self.statuses else 200
+        if status == 200 and any(symbol not in KNOWN_SYMBOLS for symbol in symbols.split(',')):
+            status = 404
+        if status != 200:
+            self.send_response(status)
+            self.end_headers()
+            return
+
+        rows = [{'Date': f'2024-01-0{i + 1}', 'Open': 10.0 + i, 'High': 11.0 + i, 'Low': 9.0 + i,
+                 'Close': 10.5 + i, 'Volume': 100} for i in range(5)]
+        body = json.dumps({symbol: rows for symbol in symbols.split(',')}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FetcherTest(unittest.TestCase):
+
+    def setUp(self):
+        StubHandler.calls = []
+        StubHandler.statuses = []
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        backend = HTTPBackend(f'http://127.0.0.1:{self.server.server_port}')
+        self.fetcher = Fetcher(backend, rate=1000, burst=1000, backoff_base=0.001,
+                               breaker=CircuitBreaker(failure_threshold=3, reset_timeout=30))
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_concurrent_requests_are_batched(self):
+        results = {}
+        threads = [threading.Thread(target=lambda s=s: results.__setitem__(s, self.fetcher.fetch(s, period='5d')))
+                   for s in KNOWN_SYMBOLS]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(StubHandler.calls), 1)
+        self.assertEqual(len(results['AAPL']), 5)
+        self.assertEqual(len(results['MSFT']), 5)
+
+    def test_server_errors_are_retried(self):
+        StubHandler.statuses = [503, 429]
+        frames = self.fetcher.download(['AAPL'], period='5d')
+        self.assertEqual(len(frames['AAPL']), 5)
+        self.assertEqual(len(StubHandler.calls), 3)
+
+    def test_circuit_opens_after_repeated_failures(self):
+        StubHandler.statuses = [500] * 10
+        with self.assertRaises(UpstreamUnavailable):
+            self.fetcher.download(['AAPL'], period='5d')
+        calls = len(StubHandler.calls)
+        with self.assertRaises(UpstreamUnavailable):
+            self.fetcher.download(['MSFT'], period='5d')
+        self.assertEqual(len(StubHandler.calls), calls)
+
+    def test_unknown_symbol_is_not_retried_and_keeps_circuit_closed(self):
+        for _ in range(5):
+            self.assertTrue(self.fetcher.fetch('NOPE', period='5d').empty)
+        self.assertEqual(len(StubHandler.calls), 5)
+        self.assertEqual(self.fetcher.breaker.state, 'closed')
+        self.assertEqual(len(self.fetcher.fetch('AAPL', period='5d')), 5)
+
+    def test_unknown_symbol_does_not_fail_its_batch(self):
+        frames = self.fetcher.download(['AAPL', 'NOPE', 'MSFT'], period='5d')
+        self.assertEqual(sorted(frames), ['AAPL', 'MSFT'])
+
+    def test_fetch_timeout_is_unavailable(self):
+        StubHandler.statuses = [503] * 10
+        self.fetcher.backoff_base = 1.0
+        with self.assertRaises(UpstreamUnavailable):
+            self.fetcher.fetch('AAPL', period='5d', timeout=0.2)
+
+    def test_slow_batch_does_not_stall_others(self):
+        release = threading.Event()
+
+        class Backend:
+            def download(self, symbols, period=None, **kwargs):
+                if period == '1y':
+                    # Stands in for a batch waiting out its retry backoff
+                    release.wait(5)
+                return {symbol: pd.DataFrame({'Close': [1.0]}) for symbol in symbols}
+
+        fetcher = Fetcher(Backend(), rate=1000, burst=1000)
+        slow = threading.Thread(target=fetcher.fetch, args=('AAPL',), kwargs={'period': '1y'})
+        slow.start()
+        time.sleep(0.1)
+        start = time.perf_counter()
+        self.assertEqual(len(fetcher.fetch('MSFT', period='5d')), 1)
+        self.assertLess(time.perf_counter() - start, 1)
+        release.set()
+        slow.join()
+
+class YahooBackendTest(unittest.TestCase):
+
+    def backend(self, errors):
+        # yfinance records per-ticker failures in shared._ERRORS and returns no data for them
+        def download(symbols, **kwargs):
+            yf.shared._ERRORS = dict(errors)
+            return pd.DataFrame()
+
+        yf = types.SimpleNamespace(download=download, shared=types.SimpleNamespace(_ERRORS={}))
+        backend = YahooBackend.__new__(YahooBackend)
+        backend._yf = yf
+        backend.session = None
+        backend._lock = threading.Lock()
+        return backend
+
+    def test_rate_limit_is_retried(self):
+        backend = self.backend({'AAPL': "YFRateLimitError('Too Many Requests. Rate limited.')"})
+        fetcher = Fetcher(backend, rate=1000, burst=1000, max_retries=2, backoff_base=0.001)
+        start = time.perf_counter()
+        with self.assertRaises(UpstreamUnavailable):
+            fetcher.download(['AAPL'], period='5d')
+        self.assertEqual(fetcher.upstream_calls, 3)
+        self.assertLess(time.perf_counter() - start, 1)
+
+    def test_delisted_symbol_is_no_data(self):
+        backend = self.backend({'NOPE': "YFTzMissingError('$NOPE: possibly delisted; No timezone found')"})
+        fetcher = Fetcher(backend, rate=1000, burst=1000)
+        self.assertEqual(fetcher.download(['NOPE'], period='5d'), {})
+        self.assertEqual(fetcher.upstream_calls, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,300 @@
+"""
+Training, loading and evaluation of the per-symbol model set
+"""
+import json
+import os
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from arima_model import ARIMAModel
+from lstm_model import LSTMModel
+from linear_regression_model import LinearRegressionModel
+from indicators import compute_indicators, select_features
+from model_store import ModelHolder
+
+MODEL_TYPES = ('ARIMA', 'LSTM', 'LINEAR')
+
+# Number of most recent bars held out to compute MAPE
+TEST_SIZE = 10
+
+
+def read_watchlist(path):
+    """
+    Read symbols from a watchlist file, one per line
+
+    Blank lines and lines starting with '#' are ignored.
+
+    Args:
+        path (str): Path to watchlist file
+
+    Returns:
+        list: Upper-cased symbols, empty if the file does not exist
+    """
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        lines = (line.split('#', 1)[0].strip() for line in f)
+        return [line.upper() for line in lines if line]
+
+
+def model_paths(symbol, model_dir):
+    """
+    Get artifact paths for a symbol
+
+    Args:
+        symbol (str): Stock symbol
+        model_dir (str): Directory with saved models
+
+    Returns:
+        dict: Path per model type, plus the forecast file
+    """
+    return {
+        'ARIMA': f'{model_dir}/arima_{symbol}.pkl',
+        'LSTM': f'{model_dir}/lstm_{symbol}',
+        'LINEAR': f'{model_dir}/linear_{symbol}.pkl',
+        'forecast': f'{model_dir}/forecast_{symbol}.json'
+    }
+
+
+def build_models(lean=False, feature_columns=None):
+    """
+    Create untrained model instances
+
+    Args:
+        lean (bool): Use memory-lean model state
+        feature_columns (list): Indicator columns for the LSTM and Linear Regression models
+
+    Returns:
+        dict: Model per model type
+    """
+    return {
+        'ARIMA': ARIMAModel(lean=lean),
+        'LSTM': LSTMModel(lean=lean, feature_columns=feature_columns),
+        'LINEAR': LinearRegressionModel(feature_columns=feature_columns)
+    }
+
+
+def bar_features(bars, feature_columns):
+    """
+    Compute model feature rows over a price history
+
+    Args:
+        bars (PriceBars): Price history
+        feature_columns (list): Indicator columns to select
+
+    Returns:
+        np.array: Feature rows aligned with bars, or None without feature columns
+    """
+    if not feature_columns:
+        return None
+    return select_features(compute_indicators(bars).values, feature_columns)
+
+
+def _train(model_type, model, close_prices, features):
+    if model_type == 'ARIMA':
+        return model.train(close_prices)
+    return model.train(close_prices, features=features)
+
+
+def load_or_train_models(symbol, bars, model_dir, lean=False, feature_columns=None, retrain=False):
+    """
+    Load saved models for a symbol, training and saving any that are missing
+
+    Args:
+        symbol (str): Stock symbol
+        bars (PriceBars): Training history, used only for models that need training
+        model_dir (str): Directory with saved models
+        lean (bool): Use memory-lean model state
+        feature_columns (list): Indicator columns for newly trained models
+        retrain (bool): Train all models even if saved ones exist
+
+    Returns:
+        tuple: ModelHolder and seconds spent per model type
+    """
+    paths = model_paths(symbol, model_dir)
+    models = build_models(lean, feature_columns)
+    close_prices = bars.close.astype(np.float64)
+    features = None
+    timings = {}
+    trained = False
+
+    for model_type, model in models.items():
+        start = time.perf_counter()
+        path = paths[model_type]
+        loaded = False
+        if not retrain and os.path.exists(path):
+            try:
+                model.load(path)
+                loaded = True
+                print(f"Loaded {model_type} model for {symbol}")
+            except Exception as e:
+                print(f"Error loading {model_type} model, training new one: {e}")
+        if not loaded:
+            if features is None:
+                features = bar_features(bars, feature_columns)
+            _train(model_type, model, close_prices, features)
+            model.save(path)
+            trained = True
+        timings[model_type] = time.perf_counter() - start
+
+    holder = ModelHolder(symbol, models['ARIMA'], models['LSTM'], models['LINEAR'])
+    # Saved MAPE only describes the saved models
+    forecast = None if trained else read_forecast(symbol, model_dir)
+    if forecast is not None:
+        holder.mape = forecast.get('mape')
+    return holder, timings
+
+
+def load_saved_models(symbol, model_dir, lean=False):
+    """
+    Load saved models for a symbol without training
+
+    Args:
+        symbol (str): Stock symbol
+        model_dir (str): Directory with saved models
+        lean (bool): Use memory-lean model state
+
+    Returns:
+        ModelHolder: Loaded models, or None if any artifact is missing
+    """
+    paths = model_paths(symbol, model_dir)
+    if not all(os.path.exists(paths[model_type]) for model_type in MODEL_TYPES):
+        return None
+
+    models = build_models(lean)
+    for model_type, model in models.items():
+        model.load(paths[model_type])
+
+    holder = ModelHolder(symbol, models['ARIMA'], models['LSTM'], models['LINEAR'])
+    forecast = read_forecast(symbol, model_dir)
+    if forecast is not None:
+        holder.mape = forecast.get('mape')
+    return holder
+
+
+def evaluate_models(bars, lean=False, feature_columns=None, test_size=TEST_SIZE):
+    """
+    Compute MAPE per model type by holding out the most recent bars
+
+    Fresh model instances are trained on the earlier bars, so resident
+    models are left untouched.
+
+    Args:
+        bars (PriceBars): Price history
+        lean (bool): Use memory-lean model state
+        feature_columns (list): Indicator columns for the LSTM and Linear Regression models
+        test_size (int): Number of held-out bars
+
+    Returns:
+        dict: MAPE per model type
+    """
+    close_prices = bars.close.astype(np.float64)
+    features = bar_features(bars, feature_columns)
+    test_data = close_prices[-test_size:]
+    train_data = close_prices[:-test_size]
+    train_features = features[:-test_size] if features is not None else None
+
+    mape = {}
+    for model_type, model in build_models(lean, feature_columns).items():
+        _train(model_type, model, train_data, train_features)
+        if model_type == 'ARIMA':
+            result = model.evaluate(test_data)
+        else:
+            result = model.evaluate(test_data, train_data, features=train_features)
+        mape[model_type] = float(result['mape'])
+    return mape
+
+
+def try_predict_interval(model, *args, **kwargs):
+    """
+    Get prediction intervals from a model, tolerating models that cannot provide them
+
+    Args:
+        model: Model with a predict_interval method
+        *args, **kwargs: Passed to predict_interval
+
+    Returns:
+        tuple: Lower and upper bounds (np.array), or (None, None) on failure
+    """
+    try:
+        return model.predict_interval(*args, **kwargs)
+    except Exception as e:
+        print(f"Error computing prediction interval with {type(model).__name__}: {e}")
+        return None, None
+
+
+def read_forecast(symbol, model_dir):
+    """
+    Read the precomputed forecast for a symbol
+
+    Args:
+        symbol (str): Stock symbol
+        model_dir (str): Directory with saved models
+
+    Returns:
+        dict: Forecast written by write_forecast, or None if missing or unreadable
+    """
+    path = model_paths(symbol, model_dir)['forecast']
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Error reading forecast for {symbol}: {e}")
+        return None
+
+
+def write_forecast(symbol, holder, bars, model_dir, future_days=7):
+    """
+    Forecast with trained models and write the result next to the artifacts
+
+    Args:
+        symbol (str): Stock symbol
+        holder (ModelHolder): Trained models with MAPE set
+        bars (PriceBars): Price history the forecast starts from
+        model_dir (str): Directory with saved models
+        future_days (int): Number of days for the multi-day ARIMA forecast
+
+    Returns:
+        dict: Forecast as written
+    """
+    close_prices = bars.close.astype(np.float64)
+    lstm_features = bar_features(bars, holder.lstm.feature_columns)
+    linear_features = bar_features(bars, holder.linear.feature_columns)
+
+    forecast = {
+        'symbol': symbol,
+        'generatedAt': datetime.now().isoformat(timespec='seconds'),
+        'date': (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d'),
+        'lastClose': float(close_prices[-1]),
+        'predictedClose': {
+            'ARIMA': float(holder.arima.predict(steps=1)[0]),
+            'LSTM': float(holder.lstm.predict(close_prices, steps=1, features=lstm_features)[0]),
+            'LINEAR': float(holder.linear.predict(close_prices, steps=1, features=linear_features)[0])
+        },
+        'future': [float(value) for value in holder.arima.predict(steps=future_days)],
+        'mape': holder.mape
+    }
+
+    # 95% intervals for the next-day predictions
+    bounds = {
+        'ARIMA': try_predict_interval(holder.arima, steps=1),
+        'LSTM': try_predict_interval(holder.lstm, close_prices, steps=1, features=lstm_features),
+        'LINEAR': try_predict_interval(holder.linear, close_prices, steps=1, features=linear_features)
+    }
+    forecast['interval'] = {
+        model_type: None if lower is None else [float(lower[0]), float(upper[0])]
+        for model_type, (lower, upper) in bounds.items()
+    }
+
+    path = model_paths(symbol, model_dir)['forecast']
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write then rename so readers never see a partial file
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(forecast, f, indent=2)
+    os.replace(tmp_path, path)
+    return forecast
@@ -15,10 +15,21 @@ const PredictionCard = ({
   currentPrice,
   colorScheme = 'blue' 
 }: PredictionCardProps) => {
-  const isPositive = data.predictedClose > currentPrice;
-  const change = data.predictedClose - currentPrice;
+  const hasPrediction = data.predictedClose !== null;
+  const isPositive = hasPrediction && data.predictedClose > currentPrice;
+  const change = hasPrediction ? data.predictedClose - currentPrice : 0;
   const changePercent = (change / currentPrice) * 100;
   
+  const getSourceLabel = () => {
+    switch (data.source) {
+      case 'cache': return 'Last result';
+      case 'forecast': return 'Precomputed';
+      case 'linear': return 'Linear fallback';
+      case 'unavailable': return 'Unavailable';
+      default: return 'Degraded';
+    }
+  };
+  
   const getColor = () => {
     switch (colorScheme) {
       case 'green': return 'bg-green-500 text-white';
@@ -38,24 +49,35 @@ const PredictionCard = ({
              'Linear Regression'}
           </span>
           <Badge variant="outline" className="text-xs bg-white/20 hover:bg-white/30">
-            MAPE: {data.mape.toFixed(2)}%
+            MAPE: {data.mape !== null ? `${data.mape.toFixed(2)}%` : 'pending'}
           </Badge>
         </CardTitle>
       </CardHeader>
       <CardContent className="p-4">
         <div className="flex flex-col items-center">
           <div className="text-2xl font-bold">
-            ${data.predictedClose.toFixed(2)}
-          </div>
-          <div className={cn(
-            "text-sm mt-1",
-            isPositive ? "text-stock-green" : "text-stock-red"
-          )}>
-            {isPositive ? "+" : ""}{change.toFixed(2)} ({isPositive ? "+" : ""}{changePercent.toFixed(2)}%)
+            {hasPrediction ? `$${data.predictedClose.toFixed(2)}` : 'N/A'}
           </div>
+          {hasPrediction && (
+            <div className={cn(
+              "text-sm mt-1",
+              isPositive ? "text-stock-green" : "text-stock-red"
+            )}>
+              {isPositive ? "+" : ""}{change.toFixed(2)} ({isPositive ? "+" : ""}{changePercent.toFixed(2)}%)
+            </div>
+          )}
           <div className="text-xs text-gray-500 mt-2">
             Prediction for {new Date(data.date).toLocaleDateString()}
           </div>
+          {data.degraded && (
+            <Badge
+              variant="outline"
+              className="text-xs mt-2 border-yellow-500 text-yellow-700"
+              title={data.asOf ? `Computed at ${new Date(data.asOf).toLocaleString()}` : undefined}
+            >
+              {getSourceLabel()}
+            </Badge>
+          )}
         </div>
       </CardContent>
     </Card>
@@ -15,6 +15,7 @@ import { useToast } from "@/components/ui/use-toast";
 import { 
   fetchStockData, 
   fetchHistoricalData, 
+  CHART_MAX_POINTS,
   fetchPredictions, 
   fetchSentimentData, 
   fetchFuturePredictions,
@@ -57,7 +58,7 @@ const Dashboard = () => {
       try {
         setLoading(true);
         const data = await fetchStockData(selectedStock);
-        const historical = await fetchHistoricalData(selectedStock, 90);
+        const historical = await fetchHistoricalData(selectedStock, 90, CHART_MAX_POINTS);
         const predictionData = await fetchPredictions(selectedStock);
         const sentiment = await fetchSentimentData(selectedStock);
         const future = await fetchFuturePredictions(selectedStock);
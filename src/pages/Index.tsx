@@ -9,7 +9,7 @@ import StockSelector from "@/components/StockSelector";
 import StockCard from "@/components/StockCard";
 import StockChart from "@/components/StockChart";
 import StockPricesList from "@/components/StockPricesList";
-import { fetchStockData, fetchHistoricalData, StockData } from "@/services/stockService";
+import { fetchStockData, fetchHistoricalData, CHART_MAX_POINTS, StockData } from "@/services/stockService";
 import { useToast } from "@/components/ui/use-toast";
 
 const Index = () => {
@@ -24,7 +24,7 @@ const Index = () => {
       try {
         setLoading(true);
         const data = await fetchStockData(selectedStock);
-        const historical = await fetchHistoricalData(selectedStock, 30);
+        const historical = await fetchHistoricalData(selectedStock, 30, CHART_MAX_POINTS);
         setStockData(data);
         setHistoricalData(historical);
       } catch (error) {
@@ -15,6 +15,7 @@ import { useToast } from "@/components/ui/use-toast";
 import { 
   fetchStockData, 
   fetchHistoricalData, 
+  CHART_MAX_POINTS,
   fetchPredictions,
   StockData 
 } from "@/services/stockService";
@@ -87,7 +88,7 @@ const Predict = () => {
       try {
         setLoading(true);
         const data = await fetchStockData(selectedStock);
-        const historical = await fetchHistoricalData(selectedStock, 60);
+        const historical = await fetchHistoricalData(selectedStock, 60, CHART_MAX_POINTS);
         
         setStockData(data);
         setHistoricalData(historical);
@@ -165,7 +166,8 @@ const Predict = () => {
         extendedPredictions: predictedData,
         model: selectedModel,
         accuracy: modelResult.mape,
-        recommendation: modelResult.predictedClose > (stockData?.close || 0) ? 'BUY' : 'SELL'
+        recommendation: modelResult.predictedClose === null ? 'N/A' :
+          modelResult.predictedClose > (stockData?.close || 0) ? 'BUY' : 'SELL'
       };
       
       setPredictionResults(results);
@@ -372,7 +374,9 @@ const Predict = () => {
                       {daysToPredict}-Day Price Prediction for {selectedStock}
                     </CardTitle>
                     <CardDescription>
-                      Using {selectedModel.toUpperCase()} model with {predictionResults.accuracy.toFixed(2)}% MAPE
+                      Using {selectedModel.toUpperCase()} model
+                      {predictionResults.accuracy !== null && ` with ${predictionResults.accuracy.toFixed(2)}% MAPE`}
+                      {predictionResults.nextDayPrediction.degraded && ' (degraded result)'}
                     </CardDescription>
                   </CardHeader>
                   <CardContent>
@@ -380,7 +384,9 @@ const Predict = () => {
                       <div className="mb-4 md:mb-0">
                         <span className="text-gray-500 block mb-1">Tomorrow's Predicted Price:</span>
                         <span className="text-3xl font-bold">
-                          ${predictionResults.nextDayPrediction.predictedClose.toFixed(2)}
+                          {predictionResults.nextDayPrediction.predictedClose !== null
+                            ? `$${predictionResults.nextDayPrediction.predictedClose.toFixed(2)}`
+                            : 'N/A'}
                         </span>
                       </div>
                       
@@ -389,7 +395,9 @@ const Predict = () => {
                         <span className={`text-lg font-bold px-4 py-1 rounded-full ${
                           predictionResults.recommendation === 'BUY' ? 
                             'bg-green-100 text-green-700' : 
-                            'bg-red-100 text-red-700'
+                          predictionResults.recommendation === 'SELL' ?
+                            'bg-red-100 text-red-700' :
+                            'bg-gray-100 text-gray-700'
                         }`}>
                           {predictionResults.recommendation}
                         </span>
@@ -409,7 +417,9 @@ const Predict = () => {
                       <h4 className="font-medium text-blue-800 mb-2">Prediction Details</h4>
                       <p className="text-sm text-blue-700">
                         This prediction was generated using the {selectedModel.toUpperCase()} model based on historical data patterns. 
-                        The model has a Mean Absolute Percentage Error (MAPE) of {predictionResults.accuracy.toFixed(2)}%. 
+                        {predictionResults.accuracy !== null
+                          ? `The model has a Mean Absolute Percentage Error (MAPE) of ${predictionResults.accuracy.toFixed(2)}%.`
+                          : 'The model\'s Mean Absolute Percentage Error (MAPE) is still being computed.'} 
                         Remember that all predictions come with inherent uncertainty and should be used as one of many factors in investment decisions.
                       </p>
                     </div>
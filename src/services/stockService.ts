@@ -18,9 +18,16 @@ export interface StockData {
 export interface PredictionData {
   symbol: string;
   date: string;
-  predictedClose: number;
+  predictedClose: number | null; // null if no model or fallback could answer in time
   modelType: 'ARIMA' | 'LSTM' | 'LINEAR';
-  mape: number; // Mean Absolute Percentage Error
+  mape: number | null; // Mean Absolute Percentage Error, null while it is being computed
+  lowerBound?: number | null; // Prediction interval, null if unavailable
+  upperBound?: number | null;
+  confidence?: number;
+  source?: 'live' | 'cache' | 'forecast' | 'linear' | 'unavailable'; // Where the value came from
+  degraded?: boolean; // True if the model missed the deadline and a fallback was used
+  elapsedMs?: number;
+  asOf?: string | null; // When the value was computed
 }
 
 export interface SentimentData {
@@ -74,14 +81,19 @@ export const fetchStockData = async (symbol: string): Promise<StockData> => {
   }
 };
 
+// Roughly the pixel width of the price charts; more points than this are not visible
+export const CHART_MAX_POINTS = 500;
+
 // Fetch historical data from API
-export const fetchHistoricalData = async (symbol: string, days: number = 30): Promise<StockData[]> => {
+// maxPoints asks the server to downsample long histories to roughly the chart width
+export const fetchHistoricalData = async (symbol: string, days: number = 30, maxPoints?: number): Promise<StockData[]> => {
   if (useMockData) {
     return fetchMockHistoricalData(symbol, days);
   }
   
   try {
-    const response = await fetch(`${API_BASE_URL}/historical/${symbol}?days=${days}`);
+    const maxPointsParam = maxPoints ? `&max_points=${maxPoints}` : '';
+    const response = await fetch(`${API_BASE_URL}/historical/${symbol}?days=${days}${maxPointsParam}`);
     
     if (!response.ok) {
       throw new Error(`API error: ${response.status}`);
@@ -95,13 +107,14 @@ export const fetchHistoricalData = async (symbol: string, days: number = 30): Pr
 };
 
 // Fetch predictions from API
-export const fetchPredictions = async (symbol: string): Promise<{ [key: string]: PredictionData }> => {
+export const fetchPredictions = async (symbol: string, deadlineMs?: number): Promise<{ [key: string]: PredictionData }> => {
   if (useMockData) {
     return fetchMockPredictions(symbol);
   }
   
   try {
-    const response = await fetch(`${API_BASE_URL}/predictions/${symbol}`);
+    const query = deadlineMs !== undefined ? `?deadline_ms=${deadlineMs}` : '';
+    const response = await fetch(`${API_BASE_URL}/predictions/${symbol}${query}`);
     
     if (!response.ok) {
       throw new Error(`API error: ${response.status}`);